@@ -0,0 +1,11 @@
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("API_ASYNC_VIEWS", "1")
+# Под ASGI синхронный код запроса выполняется в отдельном потоке, и постоянное соединение
+# с БД осталось бы висеть на каждом таком потоке.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+
+application = get_asgi_application()
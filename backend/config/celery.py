@@ -1,7 +1,18 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 app = Celery("config")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def configure_id_generator(**kwargs):
+    """Подсказывает процессу пула Celery слот в генераторе ID по номеру в пуле."""
+    from billiard.process import current_process
+
+    from todo.ids import configure_process
+
+    configure_process(current_process().index)
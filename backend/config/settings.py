@@ -22,6 +22,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -56,6 +57,9 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": "db",
         "PORT": 5432,
+        # Постоянные соединения: без них каждый запрос платит за подключение к Postgres.
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -65,18 +69,67 @@ LANGUAGE_CODE = "ru-ru"
 
 AUTH_PASSWORD_VALIDATORS = []
 
-CELERY_BROKER_URL = "redis://redis:6379/0"
+# Номер узла в ID записей (todo.ids), 0..31. Слоты процессов внутри узла, пока доступен
+# Redis, арендуются в нем, поэтому узел можно делить между контейнерами (например,
+# при --scale), но всего на узле не больше 64 процессов, выдающих ID.
+ID_NODE_ID = int(os.environ.get("ID_NODE_ID", "0"))
+ID_SLOT_LEASE_TTL = int(os.environ.get("ID_SLOT_LEASE_TTL", "60"))
+ID_SLOT_LEASE_PREFIX = "todo:ids:slots"
+
+API_PAGE_SIZE = int(os.environ.get("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", "500"))
+API_BULK_MAX_ITEMS = int(os.environ.get("API_BULK_MAX_ITEMS", "1000"))
+API_BULK_BATCH_SIZE = 500
+# Выгрузка /api/tasks/export/: строк за одно чтение серверного курсора и строк в одной записи ответа.
+API_EXPORT_CHUNK_SIZE = int(os.environ.get("API_EXPORT_CHUNK_SIZE", "2000"))
+API_EXPORT_WRITE_ROWS = 500
+# Асинхронные обработчики списка, чтения и создания задач; config/asgi.py включает их по умолчанию.
+API_ASYNC_VIEWS = os.environ.get("API_ASYNC_VIEWS", "0") == "1"
+
+CATEGORY_CACHE_SIZE = int(os.environ.get("CATEGORY_CACHE_SIZE", "1024"))
+CATEGORY_CACHE_TTL = float(os.environ.get("CATEGORY_CACHE_TTL", "60"))
+TELEGRAM_USER_CACHE_SIZE = int(os.environ.get("TELEGRAM_USER_CACHE_SIZE", "10000"))
+TELEGRAM_USER_CACHE_TTL = float(os.environ.get("TELEGRAM_USER_CACHE_TTL", "300"))
+
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "todo.pagination.IdCursorPagination",
+    "PAGE_SIZE": API_PAGE_SIZE,
+}
+
+REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/0")
+REDIS_SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT", "2"))
+# Кеш ответов `/api/tasks/?telegram_id=` в Redis; 0 отключает кеш.
+TASK_LIST_CACHE_TTL = int(os.environ.get("TASK_LIST_CACHE_TTL", "300"))
+TASK_LIST_CACHE_PREFIX = "todo:tasks"
+
+CELERY_BROKER_URL = REDIS_URL
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
+TELEGRAM_DELIVERY_WORKERS = int(os.environ.get("TELEGRAM_DELIVERY_WORKERS", "8"))
+TELEGRAM_GLOBAL_RATE = float(os.environ.get("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_PER_CHAT_INTERVAL = float(os.environ.get("TELEGRAM_PER_CHAT_INTERVAL", "1"))
+NOTIFY_MARK_CHUNK_SIZE = int(os.environ.get("NOTIFY_MARK_CHUNK_SIZE", "500"))
+NOTIFY_CLAIM_CHUNK_SIZE = int(os.environ.get("NOTIFY_CLAIM_CHUNK_SIZE", "500"))
+NOTIFY_CLAIM_LEASE_SECONDS = int(os.environ.get("NOTIFY_CLAIM_LEASE_SECONDS", "300"))
+# Полный проход beat остается страховкой на случай потерянных событий планировщика.
+NOTIFY_SWEEP_INTERVAL_MINUTES = int(os.environ.get("NOTIFY_SWEEP_INTERVAL_MINUTES", "5"))
+DEADLINE_CHANNEL = "todo:deadlines"
+DEADLINE_SCHEDULER_HORIZON_SECONDS = int(os.environ.get("DEADLINE_SCHEDULER_HORIZON_SECONDS", "3600"))
+
 CELERY_BEAT_SCHEDULE = {
-    "send-due-task-notifications-every-minute": {
+    "send-due-task-notifications-sweep": {
         "task": "todo.tasks.send_due_task_notifications",
-        "schedule": crontab(minute="*"),
+        "schedule": crontab(minute=f"*/{NOTIFY_SWEEP_INTERVAL_MINUTES}"),
     }
 }
 
 ROOT_URLCONF = "config.urls"
 STATIC_URL = "/static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedStaticFilesStorage"},
+}
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 LOGGING = {
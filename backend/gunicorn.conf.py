@@ -0,0 +1,42 @@
+"""Настройки gunicorn для продакшн-запуска бекенда.
+
+WSGI (по умолчанию, gthread):
+    gunicorn -c gunicorn.conf.py config.wsgi:application
+ASGI:
+    GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn -c gunicorn.conf.py config.asgi:application
+
+Плавная перезагрузка: `kill -HUP <pid мастера>` поднимает новые воркеры с новым
+кодом и дожидается завершения текущих запросов в старых (до graceful_timeout).
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+# Каждый поток воркера держит свое соединение с БД (CONN_MAX_AGE),
+# поэтому workers * threads должно укладываться в max_connections Postgres.
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+# Периодический перезапуск воркеров страхует от роста памяти.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+reload = os.environ.get("GUNICORN_RELOAD", "0") == "1"
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def pre_fork(server, worker):
+    # Подсказка слота генератора ID (todo.ids) — наименьший свободный среди живых воркеров,
+    # поэтому после перезапусков по max_requests номера не растут. Сам слот воркер
+    # арендует в Redis и при занятом (другим контейнером того же узла) берет следующий.
+    used = {getattr(sibling, "id_slot", None) for sibling in server.WORKERS.values()}
+    worker.id_slot = next(slot for slot in range(len(used) + 1) if slot not in used)
+
+
+def post_fork(server, worker):
+    from todo.ids import configure_process
+
+    configure_process(worker.id_slot)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
 
-from .models import Category, Task
+from .models import Category, ImportCheckpoint, Task, TelegramProfile
 
 admin.site.unregister(Group)
 
@@ -14,6 +14,15 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ("name",)
 
 
+@admin.register(TelegramProfile)
+class TelegramProfileAdmin(admin.ModelAdmin):
+    """Настройки отображения Telegram-профилей в админ-панели."""
+
+    list_display = ("id", "telegram_id", "user")
+    search_fields = ("=telegram_id", "user__username")
+    raw_id_fields = ("user",)
+
+
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     """Настройки отображения задач в админ-панели."""
@@ -29,3 +38,11 @@ class TaskAdmin(admin.ModelAdmin):
     )
     list_filter = ("category", "is_notified", "created_at")
     search_fields = ("title", "user__username")
+
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    """Настройки отображения контрольных точек импорта в админ-панели."""
+
+    list_display = ("source", "rows_done", "tasks_created", "rows_skipped", "finished_at", "updated_at")
+    search_fields = ("source",)
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class TodoConfig(AppConfig):
+    name = "todo"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .async_views import task_collection, task_detail
+
+# Подключаются перед роутером DRF, когда включен API_ASYNC_VIEWS (по умолчанию под ASGI).
+urlpatterns = [
+    path("tasks/", task_collection),
+    path("tasks/<int:pk>/", task_detail),
+]
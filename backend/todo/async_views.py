@@ -0,0 +1,152 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .models import Task
+from .pagination import IdCursorPagination
+from .response_cache import CachedTaskList, alookup_task_list, astore_task_list
+from .serializers import TaskListRepresentation, TaskSerializer
+from .services import (
+    aget_or_create_user_id_by_telegram_id,
+    parse_telegram_id,
+)
+from .versions import aget_task_list_state, task_list_digest
+from .views import TaskViewSet, task_list_preconditions
+
+_renderer = JSONRenderer()
+_sync_list = TaskViewSet.as_view({"get": "list", "post": "create"})
+_sync_detail = TaskViewSet.as_view(
+    {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}
+)
+
+
+def _json(data, status: int = 200) -> HttpResponse:
+    return HttpResponse(_renderer.render(data), status=status, content_type=_renderer.media_type)
+
+
+def _error(exc: APIException) -> HttpResponse:
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    return _json(detail, exc.status_code)
+
+
+def _is_json_request(request) -> bool:
+    """Асинхронные обработчики отдают только JSON; браузерный API остается за TaskViewSet."""
+    return request.GET.get("format", "json") == "json" and "text/html" not in request.headers.get(
+        "Accept", ""
+    )
+
+
+async def _list(request) -> HttpResponse:
+    """Список задач пользователя: Redis-кеш без потоков, промах — async ORM и одна выборка страницы."""
+    try:
+        representation = TaskListRepresentation(
+            TaskListRepresentation.parse_fields(request.GET.get("fields"))
+        )
+    except APIException as exc:
+        return _error(exc)
+    telegram_id = parse_telegram_id(request.GET["telegram_id"])
+    # Тот же ключ, что у TaskViewSet.list: ETag и записи кеша общие для обоих путей.
+    digest = task_list_digest(request.get_host(), "json", query=request.GET.items())
+    cacheable = telegram_id is not None and settings.TASK_LIST_CACHE_TTL > 0
+
+    if cacheable:
+        cached = await alookup_task_list(telegram_id, digest)
+        if cached is not None:
+            headers, response = task_list_preconditions(
+                request, cached.version, cached.modified_at, digest
+            )
+            if response is None:
+                response = _json_body(cached.body, "HIT")
+            return _with_headers(response, headers)
+
+    state = await aget_task_list_state(telegram_id) if telegram_id is not None else None
+    if state is None:
+        return _json({"next": None, "previous": None, "results": []})
+    modified_at = int(state.modified_at.timestamp())
+    headers, response = task_list_preconditions(request, state.version, modified_at, digest)
+    if response is None:
+        paginator = IdCursorPagination()
+        rows = Task.objects.filter(user_id=state.user_id).values(*representation.columns)
+        # Курсорная пагинация DRF синхронная: выборка страницы — один переход в поток.
+        page = await sync_to_async(paginator.paginate_queryset)(rows, Request(request))
+        body = _renderer.render(
+            paginator.get_paginated_response(
+                [representation.to_representation(row) for row in page]
+            ).data
+        )
+        if cacheable:
+            await astore_task_list(telegram_id, digest, CachedTaskList(state.version, modified_at, body))
+            response = _json_body(body, "MISS")
+        else:
+            response = _json_body(body)
+    return _with_headers(response, headers)
+
+
+def _json_body(body: bytes, cache_status: str | None = None) -> HttpResponse:
+    response = HttpResponse(body, content_type=_renderer.media_type)
+    if cache_status:
+        response["X-Cache"] = cache_status
+    return response
+
+
+def _with_headers(response: HttpResponse, headers: dict[str, str]) -> HttpResponse:
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+async def _retrieve(request, pk: int) -> HttpResponse:
+    """Задача по ID через async ORM; `?telegram_id=` ограничивает выборку задачами пользователя."""
+    queryset = Task.objects.select_related("category").filter(pk=pk)
+    if request.GET.get("telegram_id"):
+        telegram_id = parse_telegram_id(request.GET["telegram_id"])
+        state = await aget_task_list_state(telegram_id) if telegram_id is not None else None
+        if state is None:
+            return _json({"detail": "No Task matches the given query."}, 404)
+        queryset = queryset.filter(user_id=state.user_id)
+    task = await queryset.afirst()
+    if task is None:
+        return _json({"detail": "No Task matches the given query."}, 404)
+    return _json(TaskSerializer(task).data)
+
+
+async def _create(request) -> HttpResponse:
+    """Создание задачи: валидация сериализатором в потоке, запись через async ORM."""
+    parsers = [parser() for parser in TaskViewSet.parser_classes]
+    try:
+        serializer = TaskSerializer(data=Request(request, parsers=parsers).data)
+        # Проверки category_id и user обращаются к БД синхронно.
+        if not await sync_to_async(serializer.is_valid)():
+            return _json(serializer.errors, 400)
+    except APIException as exc:
+        return _error(exc)
+    data = dict(serializer.validated_data)
+    telegram_id = data.pop("telegram_id", None)
+    if data.get("user") is None and telegram_id:
+        data.pop("user", None)
+        data["user_id"] = await aget_or_create_user_id_by_telegram_id(telegram_id)
+    task = await Task.objects.acreate(**data)
+    return _json(TaskSerializer(task).data, 201)
+
+
+@csrf_exempt
+async def task_collection(request) -> HttpResponse:
+    """`/api/tasks/` под ASGI: GET по `telegram_id` и POST асинхронные, остальное — TaskViewSet."""
+    if _is_json_request(request):
+        if request.method == "GET" and request.GET.get("telegram_id"):
+            return await _list(request)
+        if request.method == "POST":
+            return await _create(request)
+    return await sync_to_async(_sync_list)(request)
+
+
+@csrf_exempt
+async def task_detail(request, pk: int) -> HttpResponse:
+    """`/api/tasks/<id>/` под ASGI: GET асинхронный, изменение и удаление — TaskViewSet."""
+    if request.method == "GET" and _is_json_request(request):
+        return await _retrieve(request, pk)
+    return await sync_to_async(_sync_detail)(request, pk=pk)
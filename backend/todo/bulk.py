@@ -0,0 +1,167 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+
+from .ids import reserve_ids
+from .models import Category, Task
+from .scheduler import deadline_change_for, publish_deadline_changes
+from .serializers import TaskBulkItemSerializer, TaskBulkUpdateItemSerializer
+from .services import forget_telegram_user, resolve_users_by_telegram_ids
+from .versions import bump_task_versions, deferred_version_bumps
+
+BULK_UPDATE_FIELDS = ("title", "category_id", "due_date")
+
+
+class BulkPayloadError(ValueError):
+    """Тело пакетного запроса не является списком допустимого размера."""
+
+
+def _check_payload(items) -> list:
+    if not isinstance(items, list):
+        raise BulkPayloadError("Expected a list of items.")
+    if len(items) > settings.API_BULK_MAX_ITEMS:
+        raise BulkPayloadError(f"At most {settings.API_BULK_MAX_ITEMS} items per request.")
+    return items
+
+
+def _validate_items(items: list, serializer_class) -> tuple[dict[int, dict], list[dict]]:
+    """Валидирует элементы по отдельности и возвращает корректные данные и ошибки по индексам."""
+    valid: dict[int, dict] = {}
+    errors: list[dict] = []
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            valid[index] = serializer.validated_data
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+    return valid, errors
+
+
+def _existing_category_ids(valid: dict[int, dict]) -> set[int]:
+    """Одним запросом проверяет все упомянутые в пакете категории."""
+    category_ids = {data["category_id"] for data in valid.values() if data.get("category_id")}
+    if not category_ids:
+        return set()
+    return set(Category.objects.filter(id__in=category_ids).values_list("id", flat=True))
+
+
+def _reject(valid: dict[int, dict], errors: list[dict], index: int, field: str, message: str):
+    del valid[index]
+    errors.append({"index": index, "errors": {field: [message]}})
+
+
+def _publish_after_commit(changes: list[tuple[int, float | None]]) -> None:
+    transaction.on_commit(lambda: publish_deadline_changes(changes))
+
+
+def bulk_create_tasks(items) -> tuple[list[int], list[dict]]:
+    """Создает задачи пакетом: пользователи и категории разрешаются один раз на пакет."""
+    valid, errors = _validate_items(_check_payload(items), TaskBulkItemSerializer)
+
+    category_ids = _existing_category_ids(valid)
+    users_by_telegram_id = resolve_users_by_telegram_ids(
+        data["telegram_id"] for data in valid.values() if data.get("user") is None
+    )
+    # Связи из кеша процесса проверяются тем же запросом, что и явные `user`: если
+    # пользователя удалили в другом воркере, связь разрешается заново по БД, иначе
+    # нарушение FK сорвало бы весь пакет на коммите.
+    user_ids = {data["user"] for data in valid.values() if data.get("user") is not None}
+    existing_user_ids = set(
+        User.objects.filter(id__in=user_ids | set(users_by_telegram_id.values())).values_list(
+            "id", flat=True
+        )
+    )
+    stale = [
+        telegram_id
+        for telegram_id, user_id in users_by_telegram_id.items()
+        if user_id not in existing_user_ids
+    ]
+    if stale:
+        for telegram_id in stale:
+            forget_telegram_user(telegram_id)
+        users_by_telegram_id.update(resolve_users_by_telegram_ids(stale, cached=False))
+
+    rows: list[dict] = []
+    for index, data in list(valid.items()):
+        if data.get("category_id") and data["category_id"] not in category_ids:
+            _reject(valid, errors, index, "category_id", "Category does not exist.")
+            continue
+        user_id = data.get("user")
+        if user_id is not None and user_id not in existing_user_ids:
+            _reject(valid, errors, index, "user", "User does not exist.")
+            continue
+        rows.append(
+            {
+                "title": data["title"],
+                "category_id": data.get("category_id"),
+                "due_date": data.get("due_date"),
+                "user_id": user_id if user_id is not None else users_by_telegram_id[int(data["telegram_id"])],
+            }
+        )
+    # ID резервируются одним блоком: конструктор модели не вызывает gen_pk для каждой строки.
+    tasks = [Task(id=task_id, **row) for task_id, row in zip(reserve_ids(len(rows)), rows)]
+
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=settings.API_BULK_BATCH_SIZE)
+        bump_task_versions({task.user_id for task in tasks})
+        _publish_after_commit([deadline_change_for(task) for task in tasks])
+    errors.sort(key=lambda error: error["index"])
+    return [task.id for task in tasks], errors
+
+
+def bulk_update_tasks(queryset: QuerySet, items) -> tuple[list[int], list[dict]]:
+    """Обновляет задачи пакетом через bulk_update; чужие и отсутствующие задачи дают ошибку."""
+    valid, errors = _validate_items(_check_payload(items), TaskBulkUpdateItemSerializer)
+
+    category_ids = _existing_category_ids(valid)
+    tasks_by_id = queryset.in_bulk([data["id"] for data in valid.values()])
+
+    changed: dict[int, Task] = {}
+    fields: set[str] = set()
+    for index, data in list(valid.items()):
+        task = tasks_by_id.get(data["id"])
+        if task is None:
+            _reject(valid, errors, index, "id", "Task not found.")
+            continue
+        if data.get("category_id") and data["category_id"] not in category_ids:
+            _reject(valid, errors, index, "category_id", "Category does not exist.")
+            continue
+        for field in BULK_UPDATE_FIELDS:
+            if field in data:
+                setattr(task, field, data[field])
+                fields.add(field)
+        changed[task.id] = task
+
+    if changed and fields:
+        with transaction.atomic():
+            Task.objects.bulk_update(
+                changed.values(),
+                [field.removesuffix("_id") for field in sorted(fields)],
+                batch_size=settings.API_BULK_BATCH_SIZE,
+            )
+            bump_task_versions({task.user_id for task in changed.values()})
+            _publish_after_commit([deadline_change_for(task) for task in changed.values()])
+    errors.sort(key=lambda error: error["index"])
+    return list(changed), errors
+
+
+def bulk_delete_tasks(queryset: QuerySet, ids) -> tuple[list[int], list[dict]]:
+    """Удаляет задачи пакетом; отсутствующие или чужие ID попадают в ошибки."""
+    _check_payload(ids)
+    errors: list[dict] = []
+    requested: dict[int, int] = {}
+    for index, task_id in enumerate(ids):
+        if isinstance(task_id, int) and not isinstance(task_id, bool):
+            requested.setdefault(task_id, index)
+        else:
+            errors.append({"index": index, "errors": {"id": ["A valid integer is required."]}})
+
+    with transaction.atomic(), deferred_version_bumps():
+        found = set(queryset.filter(id__in=requested).values_list("id", flat=True))
+        Task.objects.filter(id__in=found).delete()
+    for task_id, index in requested.items():
+        if task_id not in found:
+            errors.append({"index": index, "errors": {"id": ["Task not found."]}})
+    errors.sort(key=lambda error: error["index"])
+    return [task_id for task_id in requested if task_id in found], errors
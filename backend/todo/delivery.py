@@ -0,0 +1,235 @@
+import http.client
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_HOST = "api.telegram.org"
+
+
+@dataclass(frozen=True)
+class OutgoingMessage:
+    """Сообщение для отправки в Telegram, привязанное к задаче."""
+
+    task_id: int
+    chat_id: str
+    text: str
+    reply_markup: dict | None = None
+
+
+@dataclass
+class DeliveryReport:
+    """Итог одного прогона рассылки."""
+
+    sent: list[int] = field(default_factory=list)
+    failed: list[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Количество успешно отправленных сообщений в секунду."""
+        return len(self.sent) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class RetryAfter(Exception):
+    """Telegram ответил 429: отправку нужно приостановить на `seconds` секунд."""
+
+    def __init__(self, seconds: float):
+        super().__init__(f"retry after {seconds} s")
+        self.seconds = seconds
+
+
+class RateLimiter:
+    """Потокобезопасный ограничитель темпа отправки в Telegram.
+
+    Общий лимит реализован токен-бакетом на `global_rate` сообщений в секунду,
+    для каждого чата дополнительно выдерживается `per_chat_interval` секунд
+    между сообщениями. `pause()` останавливает все отправки на время из ответа 429.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        per_chat_interval: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._rate = global_rate
+        self._per_chat_interval = per_chat_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = global_rate
+        self._updated_at = clock()
+        self._chat_ready_at: dict[str, float] = {}
+        self._paused_until = float("-inf")
+
+    def acquire(self, chat_id: str) -> None:
+        """Блокирует поток, пока отправка в чат не станет допустимой."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self._rate, self._tokens + (now - self._updated_at) * self._rate
+                )
+                self._updated_at = now
+                chat_ready_at = self._chat_ready_at.get(chat_id, now)
+                if self._paused_until > now:
+                    wait = self._paused_until - now
+                elif chat_ready_at > now:
+                    wait = chat_ready_at - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    self._chat_ready_at[chat_id] = now + self._per_chat_interval
+                    return
+                else:
+                    wait = (1 - self._tokens) / self._rate
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Останавливает отправку во все чаты на `seconds` секунд."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+_local = threading.local()
+
+
+def _get_connection(timeout: float) -> http.client.HTTPSConnection:
+    """Возвращает keep-alive соединение с Bot API, закрепленное за потоком."""
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        connection = http.client.HTTPSConnection(TELEGRAM_API_HOST, timeout=timeout)
+        _local.connection = connection
+    return connection
+
+
+def _drop_connection() -> None:
+    """Закрывает соединение потока, чтобы следующий запрос открыл новое."""
+    connection = getattr(_local, "connection", None)
+    if connection is not None:
+        connection.close()
+        _local.connection = None
+
+
+class _RequestNotSent(ConnectionError):
+    """Запрос заведомо не обработан сервером, поэтому его можно повторить."""
+
+
+def _post_once(path: str, body: bytes, timeout: float) -> tuple[int, dict]:
+    """Один POST по соединению потока; при сетевой ошибке соединение сбрасывается.
+
+    Если подключиться не удалось или сервер закрыл простаивавшее keep-alive
+    соединение, не начав ответ, ошибка поднимается как `_RequestNotSent`.
+    """
+    connection = _get_connection(timeout)
+    reused = connection.sock is not None
+    if not reused:
+        try:
+            connection.connect()
+        except OSError as exc:
+            _drop_connection()
+            raise _RequestNotSent(exc) from exc
+    response = None
+    try:
+        connection.request(
+            "POST",
+            path,
+            body=body,
+            headers={"Content-Type": "application/json", "Connection": "keep-alive"},
+        )
+        response = connection.getresponse()
+        raw = response.read()
+    except (http.client.HTTPException, OSError) as exc:
+        _drop_connection()
+        if reused and response is None and isinstance(
+            exc, (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+        ):
+            raise _RequestNotSent(exc) from exc
+        raise
+    if response.will_close:
+        _drop_connection()
+    try:
+        data = json.loads(raw) if raw else {}
+    except ValueError:
+        data = {}
+    return response.status, data
+
+
+def telegram_api_post(bot_token: str, method: str, payload: dict, timeout: float = 10) -> tuple[int, dict]:
+    """Выполняет POST к Bot API через пул соединений и возвращает статус и тело ответа.
+
+    Повторяется только запрос, не дошедший до сервера: sendMessage не идемпотентен,
+    и после прочих сетевых ошибок задача остается неотмеченной до следующего прогона.
+    """
+    path = f"/bot{bot_token}/{method}"
+    body = json.dumps(payload).encode("utf-8")
+    try:
+        return _post_once(path, body, timeout)
+    except _RequestNotSent:
+        return _post_once(path, body, timeout)
+
+
+def _interleave_by_chat(messages: Iterable[OutgoingMessage]) -> list[OutgoingMessage]:
+    """Чередует сообщения разных чатов, чтобы пер-чатовый лимит не тормозил очередь."""
+    queues: dict[str, deque[OutgoingMessage]] = defaultdict(deque)
+    for message in messages:
+        queues[message.chat_id].append(message)
+    ordered: list[OutgoingMessage] = []
+    while queues:
+        for chat_id in list(queues):
+            queue = queues[chat_id]
+            ordered.append(queue.popleft())
+            if not queue:
+                del queues[chat_id]
+    return ordered
+
+
+def deliver(
+    messages: Iterable[OutgoingMessage],
+    send: Callable[[str, str, dict | None], bool],
+    *,
+    workers: int,
+    limiter: RateLimiter,
+    on_result: Callable[[OutgoingMessage, bool], None] | None = None,
+) -> DeliveryReport:
+    """Отправляет сообщения параллельно пулом потоков с учетом лимитов Telegram.
+
+    `on_result` вызывается в вызывающем потоке по мере завершения отправок.
+    """
+
+    def _send(message: OutgoingMessage) -> bool:
+        limiter.acquire(message.chat_id)
+        try:
+            return send(message.chat_id, message.text, message.reply_markup)
+        except RetryAfter as exc:
+            # Остальные потоки ждут вместе с этим, сообщение уйдет в следующий прогон.
+            logger.warning(
+                "Telegram ограничил частоту отправки, пауза %s с | task_id=%s", exc.seconds, message.task_id
+            )
+            limiter.pause(exc.seconds)
+            return False
+        except Exception:
+            logger.exception("Ошибка отправки уведомления | task_id=%s", message.task_id)
+            return False
+
+    report = DeliveryReport()
+    started_at = time.monotonic()
+    ordered = _interleave_by_chat(messages)
+    if ordered:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tg-delivery") as pool:
+            futures = {pool.submit(_send, message): message for message in ordered}
+            for future in as_completed(futures):
+                message = futures[future]
+                ok = future.result()
+                (report.sent if ok else report.failed).append(message.task_id)
+                if on_result is not None:
+                    on_result(message, ok)
+    report.elapsed = time.monotonic() - started_at
+    return report
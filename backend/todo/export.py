@@ -0,0 +1,87 @@
+import csv
+import json
+from collections.abc import AsyncIterator, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+from .serializers import TaskListRepresentation
+
+
+class _ErrorRenderer(BaseRenderer):
+    """Рендерер формата выгрузки: сами строки пишутся потоком, через него проходят только ошибки."""
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode() + b"\n"
+
+
+class CSVRenderer(_ErrorRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONRenderer(_ErrorRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, dict):
+        return value["id"]
+    return value
+
+
+def iter_csv(
+    rows: Iterable[dict], representation: TaskListRepresentation, batch_size: int
+) -> Iterator[bytes]:
+    """CSV с заголовком; строки склеиваются пачками по `batch_size`, чтобы не писать в сокет по одной."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(representation.fields).encode()
+    batch: list[str] = []
+    for row in rows:
+        data = representation.to_representation(row)
+        batch.append(writer.writerow([_csv_value(data[name]) for name in representation.fields]))
+        if len(batch) >= batch_size:
+            yield "".join(batch).encode()
+            batch = []
+    if batch:
+        yield "".join(batch).encode()
+
+
+def iter_ndjson(
+    rows: Iterable[dict], representation: TaskListRepresentation, batch_size: int
+) -> Iterator[bytes]:
+    """NDJSON: по объекту задачи на строку, пачками по `batch_size` строк."""
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    batch: list[str] = []
+    for row in rows:
+        batch.append(encoder.encode(representation.to_representation(row)))
+        if len(batch) >= batch_size:
+            yield ("\n".join(batch) + "\n").encode()
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode()
+
+
+async def aiter_chunks(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Отдает синхронный поток под ASGI по частям.
+
+    Синхронный итератор ASGI-обработчик Django сначала читает целиком в память;
+    здесь каждая порция берется в потоке для синхронного кода, где живет
+    соединение с серверным курсором.
+    """
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
@@ -0,0 +1,313 @@
+import atexit
+import itertools
+import logging
+import os
+import secrets
+import socket
+import threading
+import time
+from collections.abc import Callable
+
+from django.conf import settings
+from redis import RedisError
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Раскладка 63-битного ID: миллисекунды Unix-времени | узел | слот процесса | счетчик.
+# Время занимает те же биты, что и у прежнего gen_pk, поэтому новые ID больше старых.
+NODE_BITS = 5
+PROCESS_BITS = 6
+SEQUENCE_BITS = 11
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_PROCESS_SLOT = (1 << PROCESS_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+PROCESS_SHIFT = SEQUENCE_BITS
+NODE_SHIFT = SEQUENCE_BITS + PROCESS_BITS
+TIMESTAMP_SHIFT = SEQUENCE_BITS + PROCESS_BITS + NODE_BITS
+
+# Слот процесса берется без сетевых вызовов из подсказки: хуки gunicorn и Celery дают
+# слот из младшей половины, остальные процессы (manage.py, планировщик, beat) — из
+# старшей по PID. Аренда в Redis (SET NX с TTL) лишь уводит процесс на свободный слот,
+# если подсказанный уже занят, например контейнером с тем же ID_NODE_ID; на узле
+# может быть не больше 64 процессов.
+MANAGED_PROCESS_SLOTS = 1 << (PROCESS_BITS - 1)
+# Сколько значений счетчика поток забирает за раз, чтобы следующие ID выдавать без блокировки.
+THREAD_BLOCK_SIZE = 64
+
+
+def _wall_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+class SnowflakeGenerator:
+    """Генератор уникальных сортируемых по времени 63-битных ID без обращения к БД.
+
+    Уникальность между процессами дает пара (узел, слот процесса), внутри
+    процесса — счетчик в пределах миллисекунды. Исчерпав счетчик, генератор
+    ждет следующей миллисекунды; если часы ушли назад, продолжает с последней
+    выданной миллисекунды, не дожидаясь часов.
+    """
+
+    def __init__(
+        self,
+        node_id: int,
+        process_slot: int,
+        *,
+        clock: Callable[[], int] = _wall_ms,
+        block_size: int = THREAD_BLOCK_SIZE,
+    ):
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"ID_NODE_ID должен быть в диапазоне 0..{MAX_NODE_ID}.")
+        if not 0 <= process_slot <= MAX_PROCESS_SLOT:
+            raise ValueError(f"Слот процесса должен быть в диапазоне 0..{MAX_PROCESS_SLOT}.")
+        self.node_id = node_id
+        self.process_slot = process_slot
+        self._worker_bits = (node_id << NODE_SHIFT) | (process_slot << PROCESS_SHIFT)
+        self._clock = clock
+        self._block_size = block_size
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._next_sequence = 0
+        self._clock_behind = False
+        self._local = threading.local()
+
+    def next_id(self) -> int:
+        """Возвращает следующий ID; обычно без блокировки, из блока счетчика текущего потока."""
+        local = self._local
+        sequence = getattr(local, "sequence", 0)
+        # Блок годен, пока часы не ушли за его миллисекунду: так ID остаются
+        # близки ко времени выдачи, а при отставших часах блок не пропадает зря.
+        if sequence < getattr(local, "end", 0) and local.ms >= self._clock():
+            local.sequence = sequence + 1
+            return (local.ms << TIMESTAMP_SHIFT) | self._worker_bits | sequence
+        ms, sequence, count = self._reserve(self._block_size)
+        local.ms, local.sequence, local.end = ms, sequence + 1, sequence + count
+        return (ms << TIMESTAMP_SHIFT) | self._worker_bits | sequence
+
+    def reserve(self, count: int) -> list[range]:
+        """Резервирует `count` ID: по непрерывному диапазону на каждую затронутую миллисекунду.
+
+        Один захват блокировки на диапазон вместо одного на ID; диапазоны идут
+        по возрастанию и больше всех ID, выданных этим потоком раньше.
+        """
+        # Остаток блока потока отбрасывается, иначе следующий next_id() мог бы
+        # оказаться меньше только что зарезервированных ID.
+        self._local.end = 0
+        blocks: list[range] = []
+        while count > 0:
+            ms, first, taken = self._reserve(count)
+            start = (ms << TIMESTAMP_SHIFT) | self._worker_bits | first
+            blocks.append(range(start, start + taken))
+            count -= taken
+        return blocks
+
+    def _reserve(self, count: int) -> tuple[int, int, int]:
+        """Забирает до `count` значений счетчика одной миллисекунды: (мс, первое значение, сколько)."""
+        with self._lock:
+            now = self._clock()
+            if now > self._last_ms:
+                if self._clock_behind:
+                    logger.info("Часы догнали генератор ID.")
+                    self._clock_behind = False
+                self._last_ms = now
+                self._next_sequence = 0
+            elif now < self._last_ms and not self._clock_behind:
+                logger.warning(
+                    "Часы ушли назад на %d мс, ID выдаются от последней миллисекунды.",
+                    self._last_ms - now,
+                )
+                self._clock_behind = True
+            if self._next_sequence > MAX_SEQUENCE:
+                if now < self._last_ms:
+                    # Ждать, пока отставшие часы догонят, можно долго: берем следующую
+                    # миллисекунду логически, порядок и уникальность ID сохраняются.
+                    self._last_ms += 1
+                else:
+                    while now <= self._last_ms:
+                        time.sleep(0)
+                        now = self._clock()
+                    self._last_ms = now
+                self._next_sequence = 0
+            first = self._next_sequence
+            count = min(count, MAX_SEQUENCE + 1 - first)
+            self._next_sequence = first + count
+            return self._last_ms, first, count
+
+
+_RENEW_LEASE = """
+local owner = redis.call("GET", KEYS[1])
+if owner == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+if not owner then
+    redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RELEASE_LEASE = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class SlotLease:
+    """Аренда слота процесса на узле: ключ Redis с TTL, который продлевает фоновый поток.
+
+    Аренда только страхует от совпадения слотов и сама ID не блокирует: при
+    недоступном Redis процесс остается на своем слоте. Слот меняется, лишь
+    когда Redis ответил, что ключ занят другим процессом, — тогда вызывается
+    `on_lost`, и генератор берет новый слот.
+    """
+
+    def __init__(self, node_id: int, slot: int, on_lost: Callable[["SlotLease"], None]):
+        self.node_id = node_id
+        self.slot = slot
+        self.key = lease_key(node_id, slot)
+        self._token = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self._ttl = settings.ID_SLOT_LEASE_TTL
+        self._on_lost = on_lost
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew_forever, name="id-slot-lease", daemon=True)
+
+    @classmethod
+    def acquire(
+        cls, node_id: int, preferred_slot: int, on_lost: Callable[["SlotLease"], None]
+    ) -> "SlotLease":
+        """Занимает первый свободный слот узла, начиная с `preferred_slot`.
+
+        Если Redis недоступен, слот `preferred_slot` берется без подтверждения;
+        фоновый поток займет его в Redis, когда тот вернется.
+        """
+        try:
+            client = get_redis()
+            for offset in range(MAX_PROCESS_SLOT + 1):
+                lease = cls(node_id, (preferred_slot + offset) % (MAX_PROCESS_SLOT + 1), on_lost)
+                if client.set(lease.key, lease._token, nx=True, ex=lease._ttl):
+                    break
+            else:
+                raise RuntimeError(
+                    f"Все {MAX_PROCESS_SLOT + 1} слотов узла ID_NODE_ID={node_id} заняты: "
+                    "уменьшите число процессов или разнесите контейнеры по разным узлам."
+                )
+        except RedisError as exc:
+            logger.warning(
+                "Redis недоступен (%s): слот %d узла %d занят без аренды.", exc, preferred_slot, node_id
+            )
+            lease = cls(node_id, preferred_slot, on_lost)
+        lease._thread.start()
+        return lease
+
+    def release(self) -> None:
+        """Останавливает продление и освобождает слот, если он все еще наш."""
+        self._stop.set()
+        try:
+            get_redis().eval(_RELEASE_LEASE, 1, self.key, self._token)
+        except RedisError:
+            logger.warning("Не удалось освободить слот %d узла %d.", self.slot, self.node_id)
+
+    def _renew_forever(self) -> None:
+        while not self._stop.wait(self._ttl / 3):
+            try:
+                renewed = get_redis().eval(_RENEW_LEASE, 1, self.key, self._token, self._ttl)
+            except RedisError:
+                logger.warning("Не удалось продлить слот %d узла %d.", self.slot, self.node_id)
+                continue
+            if not renewed:
+                logger.error(
+                    "Слот %d узла %d занят другим процессом, генератор ID возьмет новый.",
+                    self.slot,
+                    self.node_id,
+                )
+                self._stop.set()
+                self._on_lost(self)
+                return
+
+
+def lease_key(node_id: int, slot: int) -> str:
+    return f"{settings.ID_SLOT_LEASE_PREFIX}:{node_id}:{slot}"
+
+
+_generator: SnowflakeGenerator | None = None
+_generator_lock = threading.Lock()
+_lease: SlotLease | None = None
+_process_slot: int | None = None
+
+
+def configure_process(process_slot: int) -> None:
+    """Подсказывает слот воркера; хуки gunicorn и Celery вызывают ее сразу после fork, до выдачи ID.
+
+    При первой выдаче ID слот арендуется в Redis: если подсказанный занят (например,
+    воркером другого контейнера с тем же узлом), берется следующий свободный, а при
+    недоступном Redis — подсказанный.
+    """
+    global _process_slot
+    with _generator_lock:
+        _process_slot = process_slot % (MAX_PROCESS_SLOT + 1)
+        _drop_generator()
+
+
+def _drop_generator() -> None:
+    global _generator, _lease
+    if _lease is not None:
+        _lease.release()
+    _generator = None
+    _lease = None
+
+
+def _on_lease_lost(lease: SlotLease) -> None:
+    global _generator, _lease
+    with _generator_lock:
+        if _lease is lease:
+            _generator = None
+            _lease = None
+
+
+def _get_generator() -> SnowflakeGenerator:
+    global _generator, _lease
+    generator = _generator
+    if generator is None:
+        with _generator_lock:
+            if _generator is None:
+                slot = _process_slot
+                if slot is None:
+                    slot = MANAGED_PROCESS_SLOTS + os.getpid() % MANAGED_PROCESS_SLOTS
+                node_id = settings.ID_NODE_ID
+                _lease = SlotLease.acquire(node_id, slot, on_lost=_on_lease_lost)
+                _generator = SnowflakeGenerator(node_id, _lease.slot)
+            generator = _generator
+    return generator
+
+
+def next_id() -> int:
+    """Возвращает следующий ID генератора текущего процесса."""
+    return _get_generator().next_id()
+
+
+def reserve_ids(count: int) -> list[int]:
+    """Резервирует `count` возрастающих ID разом — для bulk_create, импорта и фикстур."""
+    return list(itertools.chain.from_iterable(_get_generator().reserve(count)))
+
+
+def _release_at_exit() -> None:
+    with _generator_lock:
+        _drop_generator()
+
+
+def _reset_after_fork() -> None:
+    # Дочерний процесс не должен продолжать счетчик родителя под тем же слотом
+    # и не владеет его арендой: при первой выдаче ID он арендует свой слот.
+    global _generator, _generator_lock, _lease, _process_slot
+    _generator_lock = threading.Lock()
+    _generator = None
+    _lease = None
+    _process_slot = None
+
+
+atexit.register(_release_at_exit)
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,366 @@
+import csv
+import gzip
+import io
+import json
+import os
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import IO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .ids import reserve_ids
+from .models import Category, ImportCheckpoint, Task, TelegramProfile
+from .scheduler import publish_deadline_changes
+from .services import parse_telegram_id, resolve_users_by_telegram_ids
+from .versions import bump_task_versions
+
+FORMATS = ("csv", "ndjson")
+TRUE_VALUES = frozenset({"1", "true", "t", "yes", "y"})
+FALSE_VALUES = frozenset({"", "0", "false", "f", "no", "n"})
+TITLE_MAX_LENGTH = Task._meta.get_field("title").max_length
+COPY_COLUMNS = ("id", "user_id", "title", "category_id", "created_at", "due_date", "is_notified")
+
+
+class ImportRowError(ValueError):
+    """Строка файла не может стать задачей; импорт пропускает ее и продолжает."""
+
+
+@dataclass
+class ImportRow:
+    """Разобранная строка файла: пользователь и категория еще не разрешены в ID."""
+
+    line: int
+    title: str
+    due_date: datetime | None
+    is_notified: bool
+    telegram_id: int | None = None
+    user_id: int | None = None
+    category_id: int | None = None
+    category_name: str | None = None
+
+
+@dataclass
+class ChunkResult:
+    rows: int
+    created: int
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+
+def detect_format(path: str) -> str:
+    """Определяет формат по расширению, `.gz` снимается."""
+    name = path.lower().removesuffix(".gz")
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    raise ValueError(f"Cannot detect format of {path!r}, pass --format.")
+
+
+def open_source(path: str) -> IO[str]:
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[tuple[int, dict | None]]:
+    """Лениво отдает записи файла с номером строки; нечитаемая запись отдается как None.
+
+    Каждая запись файла — ровно один элемент, так что их число совпадает
+    с `rows_done` контрольной точки и продолжение не зависит от ошибок в данных.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = _text(value).lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ImportRowError(f"is_notified: invalid boolean {value!r}.")
+
+
+def _parse_due_date(value) -> datetime | None:
+    text = _text(value)
+    if not text:
+        return None
+    try:
+        due_date = parse_datetime(text)
+    except ValueError:
+        due_date = None
+    if due_date is None:
+        raise ImportRowError(f"due_date: invalid datetime {text!r}.")
+    if timezone.is_naive(due_date):
+        due_date = timezone.make_aware(due_date)
+    return due_date
+
+
+def _parse_id(value, name: str) -> int | None:
+    text = _text(value)
+    if not text:
+        return None
+    if not text.isdigit():
+        raise ImportRowError(f"{name}: invalid id {text!r}.")
+    return int(text)
+
+
+def parse_record(line: int, record: dict | None) -> ImportRow:
+    """Разбирает запись без обращений к БД.
+
+    Понимает формат выгрузки `/api/tasks/export/`: `category` — ID в CSV
+    и объект в NDJSON, имя берется из `category_name`.
+    """
+    if record is None:
+        raise ImportRowError("Malformed record.")
+    title = _text(record.get("title"))
+    if not title:
+        raise ImportRowError("title: this field is required.")
+    if len(title) > TITLE_MAX_LENGTH:
+        raise ImportRowError(f"title: longer than {TITLE_MAX_LENGTH} characters.")
+
+    row = ImportRow(
+        line=line,
+        title=title,
+        due_date=_parse_due_date(record.get("due_date")),
+        is_notified=_parse_bool(record.get("is_notified")),
+    )
+    telegram_id = _text(record.get("telegram_id"))
+    if telegram_id:
+        row.telegram_id = parse_telegram_id(telegram_id)
+        if row.telegram_id is None:
+            raise ImportRowError("telegram_id: must be a positive integer.")
+    else:
+        row.user_id = _parse_id(record.get("user"), "user")
+        if row.user_id is None:
+            raise ImportRowError("Either `user` or `telegram_id` must be provided.")
+
+    category = record.get("category")
+    if isinstance(category, dict):
+        category = category.get("id")
+    row.category_name = _text(record.get("category_name")) or None
+    if row.category_name is None:
+        row.category_id = _parse_id(record.get("category_id") or category, "category")
+    return row
+
+
+def parse_records(records: Iterable[tuple[int, dict | None]]) -> Iterator[ImportRow | ImportRowError]:
+    """Ошибки разбора отдаются в поток вместе со строками, чтобы учесть их в порции."""
+    for line, record in records:
+        try:
+            yield parse_record(line, record)
+        except ImportRowError as exc:
+            exc.line = line
+            yield exc
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Resolver:
+    """Сопоставления Telegram ID → пользователь и имя → категория, построенные один раз.
+
+    Недостающие пользователи и категории создаются пачкой на порцию строк,
+    после чего сопоставления дополняются; повторных запросов на строку нет.
+    """
+
+    def __init__(self):
+        self.users_by_telegram_id: dict[int, int] = dict(
+            TelegramProfile.objects.values_list("telegram_id", "user_id").iterator(chunk_size=10_000)
+        )
+        self.categories_by_name: dict[str, int] = {
+            name.lower(): category_id
+            for category_id, name in Category.objects.values_list("id", "name")
+        }
+        self.category_ids: set[int] = set(self.categories_by_name.values())
+        self._user_ids: set[int] | None = None
+
+    def user_exists(self, user_id: int) -> bool:
+        # Множество ID пользователей строится при первой строке с `user`.
+        if self._user_ids is None:
+            self._user_ids = set(User.objects.values_list("id", flat=True).iterator(chunk_size=10_000))
+        return user_id in self._user_ids
+
+    def create_missing(self, rows: list[ImportRow]) -> None:
+        telegram_ids = {
+            row.telegram_id
+            for row in rows
+            if row.telegram_id is not None and row.telegram_id not in self.users_by_telegram_id
+        }
+        if telegram_ids:
+            self.users_by_telegram_id.update(resolve_users_by_telegram_ids(telegram_ids))
+        names = {
+            row.category_name.lower(): row.category_name
+            for row in rows
+            if row.category_name is not None and row.category_name.lower() not in self.categories_by_name
+        }
+        if names:
+            self._create_categories(names)
+
+    def _create_categories(self, names: dict[str, str]) -> None:
+        category_ids = iter(reserve_ids(len(names)))
+        Category.objects.bulk_create(
+            [Category(id=next(category_ids), name=name) for name in names.values()],
+            ignore_conflicts=True,
+        )
+        # lower() в БД зависит от локали (в "C" кириллица не меняется), поэтому
+        # созданные категории ищутся и по точному имени.
+        created = (
+            Category.objects.alias(name_lower=Lower("name"))
+            .filter(Q(name__in=list(names.values())) | Q(name_lower__in=list(names)))
+            .values_list("id", "name")
+        )
+        for category_id, name in created:
+            self.categories_by_name[name.lower()] = category_id
+            self.category_ids.add(category_id)
+
+    def resolve(self, row: ImportRow) -> tuple[int, int | None]:
+        """Возвращает (user_id, category_id) строки или бросает ImportRowError."""
+        if row.telegram_id is not None:
+            user_id = self.users_by_telegram_id.get(row.telegram_id)
+            if user_id is None:
+                raise ImportRowError("telegram_id: user could not be created.")
+        elif self.user_exists(row.user_id):
+            user_id = row.user_id
+        else:
+            raise ImportRowError("user: user does not exist.")
+        if row.category_name is not None:
+            category_id = self.categories_by_name.get(row.category_name.lower())
+            if category_id is None:
+                raise ImportRowError("category_name: category could not be created.")
+            return user_id, category_id
+        if row.category_id is not None and row.category_id not in self.category_ids:
+            raise ImportRowError("category: category does not exist.")
+        return user_id, row.category_id
+
+
+def _insert(rows: list[tuple]) -> None:
+    tasks = [Task(**dict(zip(COPY_COLUMNS, row))) for row in rows]
+    Task.objects.bulk_create(tasks, batch_size=settings.API_BULK_BATCH_SIZE)
+
+
+def _copy(rows: list[tuple]) -> None:
+    """Загружает порцию одной командой COPY FROM STDIN через курсор psycopg2."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    table = connection.ops.quote_name(Task._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(column) for column in COPY_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+# Загрузчики получают кортежи значений в порядке COPY_COLUMNS: для COPY
+# экземпляры моделей не нужны вовсе.
+LOADERS = {"insert": _insert, "copy": _copy}
+
+
+def default_method() -> str:
+    return "copy" if connection.vendor == "postgresql" else "insert"
+
+
+def import_chunk(
+    items: list[ImportRow | ImportRowError],
+    resolver: Resolver,
+    checkpoint: ImportCheckpoint,
+    method: str,
+) -> ChunkResult:
+    """Загружает порцию и сдвигает контрольную точку в той же транзакции."""
+    result = ChunkResult(rows=len(items), created=0)
+    rows = [item for item in items if isinstance(item, ImportRow)]
+    result.errors = [(item.line, str(item)) for item in items if isinstance(item, ImportRowError)]
+
+    created_at = timezone.now()
+    horizon = created_at + timedelta(seconds=settings.DEADLINE_SCHEDULER_HORIZON_SECONDS)
+    with transaction.atomic():
+        resolver.create_missing(rows)
+        resolved: list[tuple[ImportRow, int, int | None]] = []
+        for row in rows:
+            try:
+                resolved.append((row, *resolver.resolve(row)))
+            except ImportRowError as exc:
+                result.errors.append((row.line, str(exc)))
+        values = [
+            (task_id, user_id, row.title, category_id, created_at, row.due_date, row.is_notified)
+            for task_id, (row, user_id, category_id) in zip(reserve_ids(len(resolved)), resolved)
+        ]
+        if values:
+            LOADERS[method](values)
+            bump_task_versions({user_id for _, user_id, _ in resolved})
+        checkpoint.rows_done += result.rows
+        checkpoint.rows_skipped += len(result.errors)
+        checkpoint.tasks_created += len(values)
+        checkpoint.save(update_fields=["rows_done", "rows_skipped", "tasks_created", "updated_at"])
+        # Дальние дедлайны планировщик подберет сам при перечитывании горизонта;
+        # публикуются только ближние, чтобы импорт не заваливал канал событиями.
+        changes = [
+            (task_id, due_date.timestamp())
+            for task_id, _, _, _, _, due_date, is_notified in values
+            if due_date is not None and not is_notified and due_date <= horizon
+        ]
+        if changes:
+            transaction.on_commit(lambda: publish_deadline_changes(changes))
+    result.created = len(values)
+    result.errors.sort()
+    return result
+
+
+def get_checkpoint(path: str, restart: bool = False) -> ImportCheckpoint:
+    """Контрольная точка файла; смена размера файла считается новым источником."""
+    source = os.path.abspath(path)
+    size = os.path.getsize(path)
+    checkpoint, created = ImportCheckpoint.objects.get_or_create(
+        source=source, defaults={"source_size": size}
+    )
+    if not created and (restart or checkpoint.source_size != size):
+        checkpoint.source_size = size
+        checkpoint.rows_done = checkpoint.rows_skipped = checkpoint.tasks_created = 0
+        checkpoint.finished_at = None
+        checkpoint.save()
+    return checkpoint
+
+
+def iter_import(
+    stream: IO[str],
+    fmt: str,
+    checkpoint: ImportCheckpoint,
+    chunk_size: int,
+    method: str,
+) -> Iterator[ChunkResult]:
+    """Конвейер импорта: чтение → пропуск загруженного → разбор → порции → загрузка."""
+    records = islice(read_records(stream, fmt), checkpoint.rows_done, None)
+    resolver = Resolver()
+    for chunk in chunked(parse_records(records), chunk_size):
+        yield import_chunk(chunk, resolver, checkpoint, method)
+    checkpoint.finished_at = timezone.now()
+    checkpoint.save(update_fields=["finished_at", "updated_at"])
@@ -0,0 +1,77 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from todo.models import Category, Task
+from todo.serializers import TaskListRepresentation, TaskSerializer
+
+
+class Command(BaseCommand):
+    help = "Сравнивает стоимость сериализации списка задач: TaskSerializer против строк из .values()."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, rows: int, repeat: int, **options):
+        # Данные строятся в памяти, чтобы измерять только сериализацию, а не БД.
+        now = timezone.now()
+        category = Category(id=1, name="Work")
+        tasks = [
+            Task(
+                id=i,
+                user_id=1,
+                title=f"Task {i}",
+                category=category,
+                created_at=now,
+                due_date=now + timedelta(hours=i % 48),
+            )
+            for i in range(rows)
+        ]
+        value_rows = [
+            {
+                "id": task.id,
+                "user_id": task.user_id,
+                "title": task.title,
+                "category_id": category.id,
+                "category__name": category.name,
+                "created_at": task.created_at,
+                "due_date": task.due_date,
+                "is_notified": task.is_notified,
+                "notification_sent_at": task.notification_sent_at,
+            }
+            for task in tasks
+        ]
+
+        def drf():
+            return TaskSerializer(tasks, many=True).data
+
+        def lean():
+            representation = TaskListRepresentation()
+            return [representation.to_representation(row) for row in value_rows]
+
+        def lean_fields():
+            representation = TaskListRepresentation(["id", "title"])
+            return [representation.to_representation(row) for row in value_rows]
+
+        results = {}
+        for name, func in (
+            ("TaskSerializer", drf),
+            ("values() все поля", lean),
+            ("values() fields=id,title", lean_fields),
+        ):
+            best = min(self._measure(func) for _ in range(repeat))
+            results[name] = best
+            self.stdout.write(
+                f"{name:<28} {best * 1000:8.1f} мс на {rows} строк, {best / rows * 1e6:6.2f} мкс/строка"
+            )
+        speedup = results["TaskSerializer"] / results["values() все поля"]
+        self.stdout.write(f"Ускорение на полном наборе полей: x{speedup:.1f}")
+
+    @staticmethod
+    def _measure(func) -> float:
+        started_at = time.perf_counter()
+        func()
+        return time.perf_counter() - started_at
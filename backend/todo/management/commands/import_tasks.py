@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from todo.importer import (
+    FORMATS,
+    LOADERS,
+    default_method,
+    detect_format,
+    get_checkpoint,
+    iter_import,
+    open_source,
+)
+
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует задачи из CSV или NDJSON (в том числе .gz) порциями "
+        "с контрольными точками: повторный запуск продолжает с места остановки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="По умолчанию — по расширению файла.")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--method", choices=sorted(LOADERS), help="copy на PostgreSQL, иначе insert."
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Начать файл заново; уже загруженные задачи не удаляются.",
+        )
+
+    def handle(self, *args, path: str, chunk_size: int, restart: bool, **options):
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+        if options["method"] == "copy" and connection.vendor != "postgresql":
+            raise CommandError("--method copy работает только с PostgreSQL, используйте insert.")
+        try:
+            fmt = options["format"] or detect_format(path)
+            checkpoint = get_checkpoint(path, restart=restart)
+        except (ValueError, OSError) as exc:
+            raise CommandError(exc)
+        if checkpoint.finished_at is not None:
+            self.stdout.write(
+                f"{path} уже импортирован: {checkpoint.tasks_created} задач. Используйте --restart."
+            )
+            return
+        method = options["method"] or default_method()
+        if checkpoint.rows_done:
+            self.stdout.write(f"Продолжение с записи {checkpoint.rows_done + 1}")
+
+        started_at = time.perf_counter()
+        rows = created = skipped = 0
+        with open_source(path) as stream:
+            for result in iter_import(stream, fmt, checkpoint, chunk_size, method):
+                rows += result.rows
+                created += result.created
+                for line, message in result.errors:
+                    if skipped < MAX_REPORTED_ERRORS:
+                        self.stderr.write(f"строка {line}: {message}")
+                    skipped += 1
+                elapsed = time.perf_counter() - started_at
+                self.stdout.write(
+                    f"{checkpoint.rows_done} записей, создано {created}, пропущено {skipped}, "
+                    f"{rows / elapsed:,.0f} записей/с"
+                )
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово за {elapsed:.1f} с: создано {created} задач, пропущено {skipped} записей "
+                f"(всего по файлу: {checkpoint.tasks_created} задач)."
+            )
+        )
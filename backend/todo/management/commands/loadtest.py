@@ -0,0 +1,99 @@
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.ids import reserve_ids
+from todo.models import Task
+from todo.services import get_or_create_user_by_telegram_id
+from todo.versions import bump_task_versions
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест запущенного API: N потоков шлют запросы по keep-alive "
+        "соединениям, итог — RPS и перцентили задержки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000/api/tasks/?telegram_id=900000001")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Перед тестом создать столько задач пользователю из `telegram_id` в URL.",
+        )
+
+    def handle(self, *args, url: str, concurrency: int, duration: float, seed: int, **options):
+        target = urlsplit(url)
+        if target.scheme != "http" or not target.hostname:
+            raise CommandError("Ожидается http:// URL.")
+        if seed:
+            self._seed(target.query, seed)
+        path = f"{target.path}?{target.query}" if target.query else target.path
+
+        latencies: list[list[float]] = [[] for _ in range(concurrency)]
+        errors = [0] * concurrency
+        deadline = time.perf_counter() + duration
+        start = threading.Barrier(concurrency)
+
+        def worker(index: int) -> None:
+            connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+            start.wait()
+            while time.perf_counter() < deadline:
+                started_at = time.perf_counter()
+                try:
+                    connection.request("GET", path)
+                    response = connection.getresponse()
+                    response.read()
+                except (http.client.HTTPException, OSError):
+                    errors[index] += 1
+                    connection.close()
+                    continue
+                if response.status >= 400:
+                    errors[index] += 1
+                else:
+                    latencies[index].append(time.perf_counter() - started_at)
+            connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+        began_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began_at
+
+        samples = sorted(latency for bucket in latencies for latency in bucket)
+        if not samples:
+            raise CommandError(f"Ни одного успешного ответа, ошибок: {sum(errors)}.")
+        quantiles = statistics.quantiles(samples, n=100)
+        self.stdout.write(f"{url} concurrency={concurrency} duration={elapsed:.1f}s")
+        self.stdout.write(
+            f"requests={len(samples)} errors={sum(errors)} rps={len(samples) / elapsed:.1f}"
+        )
+        self.stdout.write(
+            "latency ms: "
+            f"p50={quantiles[49] * 1000:.1f} p95={quantiles[94] * 1000:.1f} "
+            f"p99={quantiles[98] * 1000:.1f} max={samples[-1] * 1000:.1f}"
+        )
+
+    def _seed(self, query: str, count: int) -> None:
+        telegram_ids = parse_qs(query).get("telegram_id")
+        if not telegram_ids:
+            raise CommandError("--seed требует telegram_id в URL.")
+        user = get_or_create_user_by_telegram_id(telegram_ids[0])
+        Task.objects.bulk_create(
+            [
+                Task(id=task_id, user=user, title=f"Load test {i}")
+                for i, task_id in enumerate(reserve_ids(count))
+            ],
+            batch_size=1000,
+        )
+        bump_task_versions([user.id])
+        self.stdout.write(f"Создано задач: {count}")
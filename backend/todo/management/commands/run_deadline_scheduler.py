@@ -0,0 +1,88 @@
+import json
+import logging
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from todo.redis_client import get_redis
+from todo.scheduler import DeadlineScheduler, load_pending_deadlines
+from todo.tasks import send_task_notifications
+
+logger = logging.getLogger("todo.scheduler")
+
+
+class Command(BaseCommand):
+    help = "Запускает планировщик, отправляющий уведомления точно в момент дедлайна."
+
+    def handle(self, *args, **options):
+        horizon = settings.DEADLINE_SCHEDULER_HORIZON_SECONDS
+        scheduler = DeadlineScheduler()
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        # Подписка оформляется до загрузки из БД, чтобы не потерять изменения между ними.
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(settings.DEADLINE_CHANNEL)
+        loaded = load_pending_deadlines(scheduler, horizon)
+        logger.info("Планировщик запущен | loaded=%s horizon=%ss", loaded, horizon)
+
+        timer = threading.Thread(
+            target=scheduler.run, args=(self._dispatch, stop), name="deadline-timer", daemon=True
+        )
+        timer.start()
+
+        reload_at = time.monotonic() + horizon / 2
+        try:
+            while not stop.is_set():
+                try:
+                    message = pubsub.get_message(timeout=1.0)
+                except (RedisConnectionError, RedisTimeoutError) as exc:
+                    # Следующий get_message переподключится и заново подпишется на канал;
+                    # события, пропущенные за время обрыва, восполняет внеочередная загрузка из БД.
+                    logger.warning("Потеряно соединение с Redis: %s", exc)
+                    stop.wait(1.0)
+                    reload_at = 0
+                    continue
+                if message is not None:
+                    self._apply(scheduler, message["data"], horizon)
+                if time.monotonic() >= reload_at:
+                    close_old_connections()
+                    load_pending_deadlines(scheduler, horizon)
+                    reload_at = time.monotonic() + horizon / 2
+        finally:
+            stop.set()
+            pubsub.close()
+            timer.join(timeout=5)
+            logger.info("Планировщик остановлен")
+
+    @staticmethod
+    def _apply(scheduler: DeadlineScheduler, raw: bytes, horizon: int) -> None:
+        """Применяет событие из Redis-канала к расписанию; некорректные события пропускаются."""
+        try:
+            event = json.loads(raw)
+            task_id, due_ts = int(event["id"]), event["due"]
+            if due_ts is not None:
+                due_ts = float(due_ts)
+        except (ValueError, TypeError, KeyError) as exc:
+            logger.warning("Некорректное событие дедлайна %r: %s", raw, exc)
+            return
+        if due_ts is None:
+            scheduler.cancel(task_id)
+        elif due_ts <= time.time() + horizon:
+            scheduler.schedule(task_id, due_ts)
+        else:
+            # Далекий дедлайн подхватит следующая загрузка горизонта.
+            scheduler.cancel(task_id)
+
+    @staticmethod
+    def _dispatch(task_ids: list[int]) -> None:
+        """Передает наступившие задачи воркерам Celery."""
+        send_task_notifications.delay(task_ids)
+        logger.info("Дедлайн наступил | tasks=%s", len(task_ids))
@@ -0,0 +1,22 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не блокирует запись в todo_task, но не работает в транзакции.
+    atomic = False
+
+    dependencies = [
+        ("todo", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("is_notified", False)),
+                fields=["due_date"],
+                name="task_due_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import todo.models
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_telegram_profiles(apps, schema_editor):
+    """Создает профили для существующих пользователей с username вида tg_<id>."""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    TelegramProfile = apps.get_model("todo", "TelegramProfile")
+
+    batch = []
+    users = User.objects.filter(username__startswith="tg_").values_list("id", "username")
+    for user_id, username in users.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        telegram_id = username.removeprefix("tg_").strip()
+        if not telegram_id.isdigit():
+            continue
+        batch.append(TelegramProfile(user_id=user_id, telegram_id=int(telegram_id)))
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            TelegramProfile.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TelegramProfile.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0002_task_due_pending_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TelegramProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(
+                        default=todo.models.gen_pk, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("telegram_id", models.BigIntegerField(unique=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="telegram_profile",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_telegram_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0003_telegramprofile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="notification_claimed_until",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
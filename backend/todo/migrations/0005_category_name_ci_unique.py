@@ -0,0 +1,33 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def merge_case_insensitive_duplicates(apps, schema_editor):
+    """Сливает категории, отличающиеся только регистром, в самую раннюю."""
+    Category = apps.get_model("todo", "Category")
+    Task = apps.get_model("todo", "Task")
+
+    keep_by_name: dict[str, int] = {}
+    for category_id, name_lower in (
+        Category.objects.annotate(name_lower=Lower("name"))
+        .order_by("id")
+        .values_list("id", "name_lower")
+    ):
+        keep_id = keep_by_name.setdefault(name_lower, category_id)
+        if keep_id != category_id:
+            Task.objects.filter(category_id=category_id).update(category_id=keep_id)
+            Category.objects.filter(id=category_id).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0004_task_notification_claimed_until"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_insensitive_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="category",
+            constraint=models.UniqueConstraint(Lower("name"), name="category_name_ci_unique"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0005_category_name_ci_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="telegramprofile",
+            name="tasks_version",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="telegramprofile",
+            name="tasks_modified_at",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+import todo.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("todo", "0006_telegramprofile_tasks_version"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="telegramprofile",
+            name="tasks_version",
+            field=models.PositiveBigIntegerField(default=todo.models.gen_pk, editable=False),
+        ),
+    ]
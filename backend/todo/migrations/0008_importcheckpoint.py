@@ -0,0 +1,27 @@
+# Generated by Django 5.0 on 2026-10-18 06:19
+
+import todo.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0007_alter_telegramprofile_tasks_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigIntegerField(default=todo.models.gen_pk, editable=False, primary_key=True, serialize=False)),
+                ('source', models.CharField(max_length=500, unique=True)),
+                ('source_size', models.BigIntegerField()),
+                ('rows_done', models.BigIntegerField(default=0)),
+                ('rows_skipped', models.BigIntegerField(default=0)),
+                ('tasks_created', models.BigIntegerField(default=0)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,28 +1,40 @@
-import os
-import threading
-import time
-
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 
-_PK_LOCK = threading.Lock()
-_PK_COUNTER = 0
+from .ids import next_id
 
 
 def gen_pk() -> int:
-    """Генерирует уникальные сортируемые BigInt ID без последовательностей БД."""
-    global _PK_COUNTER
-    ts_ms = int(time.time() * 1000)
-    pid_bits = os.getpid() & 0x3FF
-    with _PK_LOCK:
-        _PK_COUNTER = (_PK_COUNTER + 1) & 0xFFF
-        counter_bits = _PK_COUNTER
-    return (ts_ms << 22) | (pid_bits << 12) | counter_bits
+    """Генерирует уникальные сортируемые BigInt ID без последовательностей БД (см. todo.ids)."""
+    return next_id()
+
+
+class TelegramProfile(models.Model):
+    """Связь Django-пользователя с числовым Telegram ID."""
+
+    id = models.BigIntegerField(primary_key=True, default=gen_pk, editable=False)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="telegram_profile")
+    telegram_id = models.BigIntegerField(unique=True)
+    # Версия списка задач пользователя: растет при каждой записи его задач. Начинается
+    # с gen_pk(), чтобы пересозданный профиль не совпал по версии со старыми записями кеша.
+    tasks_version = models.PositiveBigIntegerField(default=gen_pk, editable=False)
+    tasks_modified_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    def __str__(self):
+        return f"{self.telegram_id} ({self.user.username})"
+
 
 class Category(models.Model):
     id = models.BigIntegerField(primary_key=True, default=gen_pk, editable=False)
     name = models.CharField(max_length=100, unique=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower("name"), name="category_name_ci_unique"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -37,6 +49,33 @@ class Task(models.Model):
     due_date = models.DateTimeField(null=True, blank=True)
     is_notified = models.BooleanField(default=False)
     notification_sent_at = models.DateTimeField(null=True, blank=True)
+    notification_claimed_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Частичный индекс под выборку beat: в нем только еще не уведомленные задачи.
+            models.Index(
+                fields=["due_date"],
+                name="task_due_pending_idx",
+                condition=models.Q(is_notified=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.user.username})"
+
+
+class ImportCheckpoint(models.Model):
+    """Прогресс `manage.py import_tasks` по файлу: сохраняется в одной транзакции с каждой порцией задач."""
+
+    id = models.BigIntegerField(primary_key=True, default=gen_pk, editable=False)
+    source = models.CharField(max_length=500, unique=True)
+    source_size = models.BigIntegerField()
+    rows_done = models.BigIntegerField(default=0)
+    rows_skipped = models.BigIntegerField(default=0)
+    tasks_created = models.BigIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} ({self.rows_done})"
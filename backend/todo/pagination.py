@@ -0,0 +1,15 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset-пагинация по сортируемому во времени ID из `gen_pk`.
+
+    Курсор непрозрачный (base64), позиция хранится как последний `id` страницы,
+    поэтому выборка страницы — это `WHERE id > ... ORDER BY id LIMIT n`
+    по первичному ключу без OFFSET и COUNT.
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
@@ -0,0 +1,167 @@
+import logging
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+# Ответ берется из кеша, только если записан для текущей версии пользователя:
+# версия и тело читаются одним EVALSHA, там же считаются попадания и промахи.
+_LOOKUP_SCRIPT = """
+local version = redis.call("GET", KEYS[1])
+local cached = redis.call("GET", KEYS[2])
+if version and cached then
+    local sep = string.find(cached, "|", 1, true)
+    if sep and string.sub(cached, 1, sep - 1) == version then
+        redis.call("HINCRBY", KEYS[3], "hits", 1)
+        return cached
+    end
+end
+redis.call("HINCRBY", KEYS[3], "misses", 1)
+return false
+"""
+
+# Версия только растет: запоздавшая запись старой версии ее не откатит.
+# Числа в Lua — double, поэтому 64-битные версии сравниваются как строки:
+# сначала по длине, затем лексикографически. TTL не продлевается, так что
+# версия откатившейся транзакции со временем истекает и берется из БД заново.
+_SET_VERSION_SCRIPT = """
+local current = redis.call("GET", KEYS[1])
+local version = ARGV[1]
+if not current or #version > #current or (#version == #current and version > current) then
+    redis.call("SET", KEYS[1], version, "EX", ARGV[2])
+end
+"""
+
+
+class CachedTaskList(NamedTuple):
+    """Закешированная страница списка задач."""
+
+    version: int
+    modified_at: int
+    body: bytes
+
+
+def _version_key(telegram_id: int) -> str:
+    return f"{settings.TASK_LIST_CACHE_PREFIX}:{telegram_id}:version"
+
+
+def _body_key(telegram_id: int, digest: str) -> str:
+    return f"{settings.TASK_LIST_CACHE_PREFIX}:{telegram_id}:page:{digest}"
+
+
+def _stats_key() -> str:
+    return f"{settings.TASK_LIST_CACHE_PREFIX}:stats"
+
+
+@lru_cache(maxsize=None)
+def _script(source: str):
+    return get_redis().register_script(source)
+
+
+def _lookup_keys(telegram_id: int, digest: str) -> list[str]:
+    return [_version_key(telegram_id), _body_key(telegram_id, digest), _stats_key()]
+
+
+def _parse_cached(cached: bytes | None) -> CachedTaskList | None:
+    if not cached:
+        return None
+    version, modified_at, body = cached.split(b"|", 2)
+    return CachedTaskList(int(version), int(modified_at), body)
+
+
+def _page_value(page: CachedTaskList) -> bytes:
+    return b"%d|%d|%s" % (page.version, page.modified_at, page.body)
+
+
+def lookup_task_list(telegram_id: int, digest: str) -> CachedTaskList | None:
+    """Возвращает страницу из кеша, если она записана для актуальной версии."""
+    try:
+        cached = _script(_LOOKUP_SCRIPT)(keys=_lookup_keys(telegram_id, digest))
+    except Exception as exc:
+        logger.warning("Кеш списка задач недоступен: %s", exc)
+        return None
+    return _parse_cached(cached)
+
+
+async def alookup_task_list(telegram_id: int, digest: str) -> CachedTaskList | None:
+    """Асинхронный вариант `lookup_task_list` для ASGI-обработчиков."""
+    client = get_async_redis()
+    try:
+        cached = await client.register_script(_LOOKUP_SCRIPT)(
+            keys=_lookup_keys(telegram_id, digest)
+        )
+    except Exception as exc:
+        logger.warning("Кеш списка задач недоступен: %s", exc)
+        return None
+    return _parse_cached(cached)
+
+
+def store_task_list(telegram_id: int, digest: str, page: CachedTaskList) -> None:
+    """Сохраняет страницу и поднимает версию в Redis до версии из БД, если она отстала."""
+    try:
+        ttl = settings.TASK_LIST_CACHE_TTL
+        pipeline = get_redis().pipeline(transaction=False)
+        _script(_SET_VERSION_SCRIPT)(
+            keys=[_version_key(telegram_id)], args=[page.version, ttl], client=pipeline
+        )
+        pipeline.set(_body_key(telegram_id, digest), _page_value(page), ex=ttl)
+        pipeline.execute()
+    except Exception as exc:
+        logger.warning("Не удалось сохранить список задач в кеш: %s", exc)
+
+
+async def astore_task_list(telegram_id: int, digest: str, page: CachedTaskList) -> None:
+    """Асинхронный вариант `store_task_list` для ASGI-обработчиков."""
+    client = get_async_redis()
+    try:
+        ttl = settings.TASK_LIST_CACHE_TTL
+        pipeline = client.pipeline(transaction=False)
+        await client.register_script(_SET_VERSION_SCRIPT)(
+            keys=[_version_key(telegram_id)], args=[page.version, ttl], client=pipeline
+        )
+        pipeline.set(_body_key(telegram_id, digest), _page_value(page), ex=ttl)
+        await pipeline.execute()
+    except Exception as exc:
+        logger.warning("Не удалось сохранить список задач в кеш: %s", exc)
+
+
+def publish_task_versions(versions: Iterable[tuple[int, int]]) -> None:
+    """Записывает в Redis новые версии пользователей: их старые страницы перестают совпадать.
+
+    Вызывается после коммита транзакции, изменившей версии. Если записать
+    версии не удалось, их ключи удаляются: без версии поиск в кеше промахивается,
+    и следующий запрос читает список из БД.
+    """
+    versions = list(versions)
+    if not versions or settings.TASK_LIST_CACHE_TTL <= 0:
+        return
+    try:
+        pipeline = get_redis().pipeline(transaction=False)
+        script = _script(_SET_VERSION_SCRIPT)
+        for telegram_id, version in versions:
+            script(
+                keys=[_version_key(telegram_id)],
+                args=[version, settings.TASK_LIST_CACHE_TTL],
+                client=pipeline,
+            )
+        pipeline.execute()
+    except Exception as exc:
+        logger.warning("Не удалось обновить версии списков задач в Redis: %s", exc)
+        try:
+            get_redis().delete(*(_version_key(telegram_id) for telegram_id, _ in versions))
+        except Exception as exc:
+            logger.error("Не удалось сбросить версии списков задач в Redis: %s", exc)
+
+
+def get_task_list_cache_stats() -> dict:
+    """Возвращает счетчики попаданий и промахов кеша списков задач."""
+    stats = get_redis().hgetall(_stats_key())
+    hits = int(stats.get(b"hits", 0))
+    misses = int(stats.get(b"misses", 0))
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": hits / total if total else 0.0}
@@ -0,0 +1,132 @@
+import heapq
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Task
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """Куча дедлайнов задач в памяти процесса.
+
+    Каждая задача хранится с актуальным временем дедлайна в `_deadlines`;
+    устаревшие записи кучи после переноса или отмены отбрасываются лениво
+    при извлечении.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time, retry_delay: float = 5.0):
+        self._clock = clock
+        self._retry_delay = retry_delay
+        self._heap: list[tuple[float, int]] = []
+        self._deadlines: dict[int, float] = {}
+        self._changed = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, task_id: int, due_ts: float) -> None:
+        """Добавляет задачу или переносит ее дедлайн."""
+        with self._changed:
+            if self._deadlines.get(task_id) == due_ts:
+                return
+            self._deadlines[task_id] = due_ts
+            heapq.heappush(self._heap, (due_ts, task_id))
+            self._changed.notify()
+
+    def cancel(self, task_id: int) -> None:
+        """Убирает задачу из расписания."""
+        with self._changed:
+            self._deadlines.pop(task_id, None)
+
+    def next_deadline(self) -> float | None:
+        """Возвращает ближайший актуальный дедлайн."""
+        with self._changed:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list[int]:
+        """Извлекает все задачи с дедлайном не позже `now`."""
+        due: list[int] = []
+        with self._changed:
+            while self._heap and self._heap[0][0] <= now:
+                due_ts, task_id = heapq.heappop(self._heap)
+                if self._deadlines.get(task_id) == due_ts:
+                    del self._deadlines[task_id]
+                    due.append(task_id)
+        return due
+
+    def run(self, dispatch: Callable[[list[int]], None], stop: threading.Event) -> None:
+        """Ждет ближайший дедлайн и передает наступившие задачи в `dispatch`.
+
+        Задачи уже извлечены из кучи, поэтому при ошибке `dispatch` (например,
+        недоступен брокер) они возвращаются в расписание через `retry_delay`,
+        а поток продолжает работу.
+        """
+        while not stop.is_set():
+            due = self.pop_due(self._clock())
+            if due:
+                try:
+                    dispatch(due)
+                except Exception:
+                    logger.exception("Не удалось передать наступившие задачи | tasks=%s", len(due))
+                    retry_at = self._clock() + self._retry_delay
+                    for task_id in due:
+                        self.schedule(task_id, retry_at)
+                continue
+            with self._changed:
+                self._drop_stale()
+                timeout = self._heap[0][0] - self._clock() if self._heap else None
+                # Ожидание прерывается новым дедлайном; ограничение нужно, чтобы заметить stop.
+                self._changed.wait(timeout=min(timeout, 1.0) if timeout is not None else 1.0)
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+
+def publish_deadline_changes(changes: Iterable[tuple[int, float | None]]) -> None:
+    """Публикует изменения дедлайнов в Redis-канал планировщика.
+
+    `None` вместо времени означает, что задачу нужно снять с расписания.
+    Ошибки Redis не прерывают запись задачи: пропущенное событие подберет
+    периодический проход beat.
+    """
+    messages = [json.dumps({"id": task_id, "due": due_ts}) for task_id, due_ts in changes]
+    if not messages:
+        return
+    try:
+        pipeline = get_redis().pipeline(transaction=False)
+        for message in messages:
+            pipeline.publish(settings.DEADLINE_CHANNEL, message)
+        pipeline.execute()
+    except Exception as exc:
+        logger.warning("Не удалось опубликовать изменения дедлайнов: %s", exc)
+
+
+def deadline_change_for(task: Task) -> tuple[int, float | None]:
+    """Возвращает событие планировщика для текущего состояния задачи."""
+    if task.due_date is None or task.is_notified:
+        return task.id, None
+    return task.id, task.due_date.timestamp()
+
+
+def load_pending_deadlines(scheduler: DeadlineScheduler, horizon_seconds: int) -> int:
+    """Загружает из БД неотправленные задачи с дедлайном в пределах горизонта."""
+    until = timezone.now() + timedelta(seconds=horizon_seconds)
+    pending = Task.objects.filter(
+        due_date__isnull=False, due_date__lte=until, is_notified=False
+    ).values_list("id", "due_date")
+    loaded = 0
+    for task_id, due_date in pending.iterator(chunk_size=2000):
+        scheduler.schedule(task_id, due_date.timestamp())
+        loaded += 1
+    return loaded
@@ -2,7 +2,11 @@ from django.contrib.auth.models import User
 from rest_framework import serializers
 
 from .models import Category, Task
-from .services import get_or_create_user_by_telegram_id
+from .services import (
+    find_category_by_name,
+    get_or_create_user_id_by_telegram_id,
+    parse_telegram_id,
+)
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -12,6 +16,19 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = "__all__"
 
+    def validate_name(self, value):
+        """Запрещает имена, совпадающие с существующими без учета регистра."""
+        existing = find_category_by_name(value)
+        if existing is not None and (self.instance is None or existing.id != self.instance.id):
+            raise serializers.ValidationError("Category with this name already exists.")
+        return value
+
+
+class CategoryResolveSerializer(serializers.Serializer):
+    """Входные данные поиска-или-создания категории по имени."""
+
+    name = serializers.CharField(max_length=100)
+
 class TaskSerializer(serializers.ModelSerializer):
     """Сериализатор задач с поддержкой привязки Telegram-пользователя."""
 
@@ -46,6 +63,12 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("created_at", "is_notified", "notification_sent_at")
 
+    def validate_telegram_id(self, value):
+        """Проверяет, что Telegram ID — положительное целое число."""
+        if parse_telegram_id(value) is None:
+            raise serializers.ValidationError("Telegram ID must be a positive integer.")
+        return value
+
     def validate(self, attrs):
         """Проверяет наличие привязки к пользователю при создании задачи."""
         if self.instance:
@@ -59,6 +82,129 @@ class TaskSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Создает задачу и при необходимости связывает ее с Telegram-пользователем."""
         telegram_id = validated_data.pop("telegram_id", None)
-        if validated_data.get("user") is None and telegram_id:
-            validated_data["user"] = get_or_create_user_by_telegram_id(telegram_id)
+        if validated_data.get("user") is not None or not telegram_id:
+            return super().create(validated_data)
+        validated_data.pop("user", None)
+        validated_data["user_id"] = get_or_create_user_id_by_telegram_id(telegram_id)
         return super().create(validated_data)
+
+
+class TaskBulkItemSerializer(serializers.Serializer):
+    """Элемент пакетного создания задач без обращений к БД при валидации."""
+
+    title = serializers.CharField(max_length=255)
+    category_id = serializers.IntegerField(required=False, allow_null=True)
+    due_date = serializers.DateTimeField(required=False, allow_null=True)
+    user = serializers.IntegerField(required=False, allow_null=True)
+    telegram_id = serializers.CharField(required=False)
+
+    def validate_telegram_id(self, value):
+        """Проверяет, что Telegram ID — положительное целое число."""
+        if parse_telegram_id(value) is None:
+            raise serializers.ValidationError("Telegram ID must be a positive integer.")
+        return value
+
+    def validate(self, attrs):
+        """Проверяет наличие привязки к пользователю."""
+        if attrs.get("user") is None and not attrs.get("telegram_id"):
+            raise serializers.ValidationError(
+                "Either `user` or `telegram_id` must be provided."
+            )
+        return attrs
+
+
+class TaskBulkUpdateItemSerializer(serializers.Serializer):
+    """Элемент пакетного обновления задач: `id` и изменяемые поля."""
+
+    id = serializers.IntegerField()
+    title = serializers.CharField(max_length=255, required=False)
+    category_id = serializers.IntegerField(required=False, allow_null=True)
+    due_date = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class TaskExportFilterSerializer(serializers.Serializer):
+    """Фильтры выгрузки задач: пользователь, категория и полуинтервал дедлайнов [due_from, due_to)."""
+
+    user = serializers.IntegerField(required=False)
+    category = serializers.IntegerField(required=False)
+    due_from = serializers.DateTimeField(required=False)
+    due_to = serializers.DateTimeField(required=False)
+
+    def to_queryset_filter(self) -> dict:
+        lookups = {
+            "user": "user_id",
+            "category": "category_id",
+            "due_from": "due_date__gte",
+            "due_to": "due_date__lt",
+        }
+        return {lookups[name]: value for name, value in self.validated_data.items()}
+
+
+class TaskListRepresentation:
+    """Плоское представление задач для списков, собираемое из `.values()`.
+
+    Строки не проходят через поля DRF: выбираются только нужные колонки,
+    а формат совпадает с `TaskSerializer`.
+    """
+
+    COLUMNS = {
+        "id": ("id",),
+        "user": ("user_id",),
+        "title": ("title",),
+        "category": ("category_id", "category__name"),
+        "category_name": ("category__name",),
+        "created_at": ("created_at",),
+        "due_date": ("due_date",),
+        "is_notified": ("is_notified",),
+        "notification_sent_at": ("notification_sent_at",),
+    }
+    DATETIME_FIELDS = frozenset({"created_at", "due_date", "notification_sent_at"})
+
+    def __init__(self, fields: list[str] | None = None):
+        self.fields = fields or list(self.COLUMNS)
+        self._timezone = serializers.DateTimeField().default_timezone()
+
+    @classmethod
+    def parse_fields(cls, raw: str | None) -> list[str] | None:
+        """Разбирает параметр `fields=a,b,c`; `id` нужен курсору и добавляется всегда."""
+        if not raw:
+            return None
+        fields = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = [name for name in fields if name not in cls.COLUMNS]
+        if unknown:
+            raise serializers.ValidationError({"fields": [f"Unknown fields: {', '.join(unknown)}."]})
+        if "id" not in fields:
+            fields.insert(0, "id")
+        return list(dict.fromkeys(fields))
+
+    @property
+    def columns(self) -> list[str]:
+        """Колонки для `.values()` под выбранный набор полей."""
+        return list(dict.fromkeys(column for name in self.fields for column in self.COLUMNS[name]))
+
+    def to_representation(self, row: dict) -> dict:
+        data = {}
+        for name in self.fields:
+            if name == "category":
+                category_id = row["category_id"]
+                data[name] = (
+                    {"id": category_id, "name": row["category__name"]}
+                    if category_id is not None
+                    else None
+                )
+            elif name in self.DATETIME_FIELDS:
+                data[name] = self._format_datetime(row[name])
+            else:
+                data[name] = row[self.COLUMNS[name][0]]
+        return data
+
+    def _format_datetime(self, value):
+        """ISO 8601 в текущей таймзоне, как `DateTimeField.to_representation`, без накладных расходов поля."""
+        if value is None:
+            return None
+        if self._timezone is not None:
+            value = value.astimezone(self._timezone)
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value.removesuffix("+00:00") + "Z"
+        return value
@@ -1,11 +1,182 @@
+from collections.abc import Iterable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+
+from .cache import TTLCache
+from .models import Category, TelegramProfile
+
+# Категории меняются редко: кеши сбрасываются сигналами при записи в этом
+# процессе, а в остальных процессах записи живут не дольше CATEGORY_CACHE_TTL.
+_categories_by_id = TTLCache(settings.CATEGORY_CACHE_SIZE, settings.CATEGORY_CACHE_TTL)
+_categories_by_name = TTLCache(settings.CATEGORY_CACHE_SIZE, settings.CATEGORY_CACHE_TTL)
+# Связь Telegram ID → пользователь почти не меняется: изменения профиля в этом процессе
+# сбрасывают запись сигналом, в остальных она живет не дольше TELEGRAM_USER_CACHE_TTL.
+# Кешем пользуются только пакетные операции (bulk, импорт); одиночные запись и чтение
+# задач разрешают пользователя по БД.
+_user_ids_by_telegram_id = TTLCache(settings.TELEGRAM_USER_CACHE_SIZE, settings.TELEGRAM_USER_CACHE_TTL)
+
+
+def parse_telegram_id(value) -> int | None:
+    """Приводит Telegram ID из запроса к числу или возвращает None."""
+    text = str(value).strip()
+    return int(text) if text.isdigit() else None
+
+
+def get_user_id_by_telegram_id(telegram_id: int) -> int | None:
+    """Возвращает ID Django-пользователя по Telegram ID без обращения к auth_user."""
+    return (
+        TelegramProfile.objects.filter(telegram_id=telegram_id)
+        .values_list("user_id", flat=True)
+        .first()
+    )
+
+
+def _remember_user_ids(user_ids: dict[int, int]) -> None:
+    # Только после коммита: пользователь из откаченной транзакции не должен попасть в кеш.
+    def remember():
+        for telegram_id, user_id in user_ids.items():
+            _user_ids_by_telegram_id.set(telegram_id, user_id)
+
+    transaction.on_commit(remember)
+
+
+def forget_telegram_user(telegram_id: int) -> None:
+    """Убирает Telegram ID из кеша после удаления профиля или пользователя."""
+    _user_ids_by_telegram_id.pop(int(telegram_id))
+
+
+def invalidate_telegram_user_cache() -> None:
+    """Сбрасывает кеш связей Telegram ID → пользователь."""
+    _user_ids_by_telegram_id.clear()
+
+
+def _create_telegram_users(telegram_ids: set[int]) -> dict[int, int]:
+    """Создает пользователей `tg_<id>` с профилями пачкой; гонки гасит ON CONFLICT DO NOTHING."""
+    usernames = {telegram_id: f"tg_{telegram_id}" for telegram_id in telegram_ids}
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [
+                User(username=username, first_name="Telegram", last_name=str(telegram_id))
+                for telegram_id, username in usernames.items()
+            ],
+            ignore_conflicts=True,
+        )
+        users = dict(
+            User.objects.filter(username__in=usernames.values()).values_list("username", "id")
+        )
+        TelegramProfile.objects.bulk_create(
+            [
+                TelegramProfile(user_id=users[username], telegram_id=telegram_id)
+                for telegram_id, username in usernames.items()
+            ],
+            ignore_conflicts=True,
+        )
+        user_ids = dict(
+            TelegramProfile.objects.filter(telegram_id__in=telegram_ids).values_list(
+                "telegram_id", "user_id"
+            )
+        )
+    # Пользователь `tg_<id>` уже связан с другим Telegram ID: как и раньше, задача достается ему.
+    for telegram_id, username in usernames.items():
+        user_ids.setdefault(telegram_id, users[username])
+    return user_ids
+
 
+def resolve_users_by_telegram_ids(telegram_ids: Iterable, *, cached: bool = True) -> dict[int, int]:
+    """Возвращает {Telegram ID: ID пользователя}, создавая недостающих пользователей пачкой.
 
-def get_or_create_user_by_telegram_id(telegram_id: str) -> User:
+    Известные связи берутся из кеша процесса (`cached=False` — только из БД),
+    остальные — одним запросом IN, ненайденные создаются через
+    bulk_create(ignore_conflicts=True).
+    """
+    wanted = {int(telegram_id) for telegram_id in telegram_ids}
+    resolved: dict[int, int] = {}
+    for telegram_id in wanted if cached else ():
+        user_id = _user_ids_by_telegram_id.get(telegram_id)
+        if user_id is not None:
+            resolved[telegram_id] = user_id
+    missing = wanted - resolved.keys()
+    if not missing:
+        return resolved
+    found = dict(
+        TelegramProfile.objects.filter(telegram_id__in=missing).values_list("telegram_id", "user_id")
+    )
+    if missing - found.keys():
+        found.update(_create_telegram_users(missing - found.keys()))
+    _remember_user_ids(found)
+    resolved.update(found)
+    return resolved
+
+
+def get_or_create_user_id_by_telegram_id(telegram_id) -> int:
+    """ID Django-пользователя, связанного с Telegram ID: один запрос к профилю, без кеша."""
+    return resolve_users_by_telegram_ids([telegram_id], cached=False)[int(telegram_id)]
+
+
+async def aget_or_create_user_id_by_telegram_id(telegram_id) -> int:
+    """Асинхронный вариант `get_or_create_user_id_by_telegram_id`."""
+    return await sync_to_async(get_or_create_user_id_by_telegram_id)(telegram_id)
+
+
+def get_or_create_user_by_telegram_id(telegram_id) -> User:
     """Возвращает Django-пользователя, связанного с Telegram ID."""
-    username = f"tg_{telegram_id}"
-    user, _ = User.objects.get_or_create(
-        username=username,
-        defaults={"first_name": "Telegram", "last_name": str(telegram_id)},
+    return User.objects.get(id=get_or_create_user_id_by_telegram_id(telegram_id))
+
+
+def find_category_by_name(name: str) -> Category | None:
+    """Ищет категорию по имени без учета регистра через индекс по lower(name)."""
+    return (
+        Category.objects.alias(name_lower=Lower("name"))
+        .filter(name_lower=Lower(Value(name.strip())))
+        .first()
     )
-    return user
+
+
+def _remember_category(category: Category) -> Category:
+    _categories_by_id.set(category.id, category)
+    _categories_by_name.set(category.name.lower(), category)
+    return category
+
+
+def invalidate_category_cache() -> None:
+    """Сбрасывает кеши категорий после изменения или удаления категории."""
+    _categories_by_id.clear()
+    _categories_by_name.clear()
+
+
+def get_category(category_id: int) -> Category | None:
+    """Возвращает категорию по ID из кеша или из БД."""
+    category = _categories_by_id.get(category_id)
+    if category is None:
+        category = Category.objects.filter(id=category_id).first()
+        if category is not None:
+            _remember_category(category)
+    return category
+
+
+def get_or_create_category_by_name(name: str) -> tuple[Category, bool]:
+    """Возвращает категорию по имени без учета регистра, создавая ее при отсутствии."""
+    category_name = name.strip()
+    category = _categories_by_name.get(category_name.lower())
+    if category is not None:
+        return category, False
+    category = find_category_by_name(category_name)
+    if category is not None:
+        return _remember_category(category), False
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                return _remember_category(Category.objects.create(name=category_name)), True
+        except IntegrityError:
+            # Параллельный запрос успел создать такую же категорию.
+            category = find_category_by_name(category_name)
+            if category is not None:
+                return _remember_category(category), False
+            # ...и ее уже удалили: создаем еще раз, повторный конфликт пробрасывается.
+            if attempt:
+                raise
@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Category, Task, TelegramProfile
+from .scheduler import deadline_change_for, publish_deadline_changes
+from .services import (
+    forget_telegram_user,
+    invalidate_category_cache,
+    invalidate_telegram_user_cache,
+)
+from .versions import bump_task_versions, bump_task_versions_for_tasks
+
+
+@receiver(post_init, sender=Task)
+def task_loaded(sender, instance: Task, **kwargs):
+    """Запоминает владельца задачи, чтобы при смене пользователя обновить обе версии."""
+    instance._loaded_user_id = instance.user_id
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance: Task, **kwargs):
+    """Обновляет версию списка владельца и сообщает планировщику о дедлайне."""
+    bump_task_versions({instance._loaded_user_id, instance.user_id})
+    instance._loaded_user_id = instance.user_id
+    change = deadline_change_for(instance)
+    transaction.on_commit(lambda: publish_deadline_changes([change]))
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance: Task, **kwargs):
+    """Снимает удаленную задачу с расписания после коммита."""
+    bump_task_versions({instance.user_id})
+    task_id = instance.id
+    transaction.on_commit(lambda: publish_deadline_changes([(task_id, None)]))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    """Сбрасывает кеш категорий при любом изменении категории."""
+    invalidate_category_cache()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_tasks_changed(sender, instance: Category, created: bool = False, **kwargs):
+    """Обновляет версии владельцев задач категории: имя категории входит в список задач."""
+    if not created:
+        bump_task_versions_for_tasks(category_id=instance.id)
+
+
+@receiver(post_save, sender=TelegramProfile)
+def telegram_profile_saved(sender, instance: TelegramProfile, created: bool, **kwargs):
+    """Профиль мог сменить Telegram ID; прежний ID неизвестен, поэтому кеш сбрасывается целиком."""
+    if not created:
+        invalidate_telegram_user_cache()
+
+
+@receiver(post_delete, sender=TelegramProfile)
+def telegram_profile_deleted(sender, instance: TelegramProfile, **kwargs):
+    """Удаление профиля (и пользователя, каскадом) убирает его Telegram ID из кеша."""
+    forget_telegram_user(instance.telegram_id)
@@ -1,27 +1,32 @@
-import json
+import http.client
 import logging
 import os
-from urllib import error, request
+import time
+from datetime import timedelta
 
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
+from .delivery import (
+    DeliveryReport,
+    OutgoingMessage,
+    RateLimiter,
+    RetryAfter,
+    deliver,
+    telegram_api_post,
+)
 from .models import Task
+from .versions import bump_task_versions_for_tasks
 
 
 logger = logging.getLogger(__name__)
 
 
-def _extract_chat_id_from_username(username: str) -> str | None:
-    """Извлекает chat_id из username вида tg_<id>."""
-    if not username.startswith("tg_"):
-        return None
-    chat_id = username.removeprefix("tg_").strip()
-    return chat_id if chat_id.isdigit() else None
-
-
 def _send_telegram_message(chat_id: str, text: str, reply_markup: dict | None = None) -> bool:
-    """Отправляет сообщение через Telegram Bot API."""
+    """Отправляет сообщение через Telegram Bot API; на ответ 429 поднимает RetryAfter."""
     bot_token = os.environ.get("TELEGRAM_BOT_TOKEN")
     if not bot_token:
         logger.warning("TELEGRAM_BOT_TOKEN не задан, отправка уведомлений пропущена.")
@@ -30,69 +35,193 @@ def _send_telegram_message(chat_id: str, text: str, reply_markup: dict | None =
     payload_data = {"chat_id": chat_id, "text": text}
     if reply_markup:
         payload_data["reply_markup"] = reply_markup
-    
-    payload = json.dumps(payload_data).encode("utf-8")
-    req = request.Request(
-        url=f"https://api.telegram.org/bot{bot_token}/sendMessage",
-        data=payload,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+
     try:
-        with request.urlopen(req, timeout=10) as response:
-            return 200 <= response.status < 300
-    except (error.URLError, error.HTTPError) as exc:
+        status, data = telegram_api_post(bot_token, "sendMessage", payload_data)
+    except (http.client.HTTPException, OSError) as exc:
         logger.warning("Не удалось отправить Telegram-уведомление: %s", exc)
         return False
+    if status == 429:
+        raise RetryAfter(float(data.get("parameters", {}).get("retry_after") or 1))
+    if not 200 <= status < 300:
+        logger.warning(
+            "Не удалось отправить Telegram-уведомление: %s %s", status, data.get("description")
+        )
+        return False
+    return True
 
 
-@shared_task
-def send_due_task_notifications() -> int:
-    """Отправляет Telegram-уведомления по задачам с наступившим дедлайном."""
-    now = timezone.now()
-    due_tasks = Task.objects.select_related("user", "category").filter(
+def _build_notification(task: Task, chat_id: int) -> OutgoingMessage:
+    """Формирует текст и клавиатуру уведомления о дедлайне."""
+    due_text = task.due_date.astimezone().strftime("%d.%m.%Y %H:%M") if task.due_date else "-"
+    category = task.category.name if task.category else "Без категории"
+    text = (
+        "🔔 Напоминание по задаче\n\n"
+        f"📝 Название: {task.title}\n"
+        f"📁 Категория: {category}\n"
+        f"📅 Дедлайн: {due_text}"
+    )
+    reply_markup = {
+        "inline_keyboard": [[
+            {"text": "✅ Ок", "callback_data": "notification_ok"}
+        ]]
+    }
+    return OutgoingMessage(task_id=task.id, chat_id=str(chat_id), text=text, reply_markup=reply_markup)
+
+
+def _mark_notified(task_ids: list[int], sent_at) -> int:
+    """Помечает задачи отправленными пачками UPDATE ... WHERE id IN (...)."""
+    chunk_size = settings.NOTIFY_MARK_CHUNK_SIZE
+    updated = 0
+    for start in range(0, len(task_ids), chunk_size):
+        chunk = task_ids[start:start + chunk_size]
+        with transaction.atomic():
+            marked = Task.objects.filter(id__in=chunk, is_notified=False).update(
+                is_notified=True, notification_sent_at=sent_at, notification_claimed_until=None
+            )
+            if marked:
+                bump_task_versions_for_tasks(id__in=chunk)
+        updated += marked
+    return updated
+
+
+def _claim_due_tasks(now, limit: int, task_ids: list[int] | None = None) -> list[int]:
+    """Атомарно захватывает до `limit` задач с наступившим дедлайном.
+
+    Строки выбираются через SELECT ... FOR UPDATE SKIP LOCKED и получают аренду
+    `notification_claimed_until`, поэтому параллельные прогоны и воркеры делят
+    очередь без пересечений. Если воркер упал, аренда истекает и задачи
+    снова становятся доступными. `task_ids` сужает выборку до конкретных задач.
+    """
+    claimed_at = timezone.now()
+    queryset = Task.objects.filter(
+        Q(notification_claimed_until__isnull=True)
+        | Q(notification_claimed_until__lt=claimed_at),
         due_date__isnull=False,
         due_date__lte=now,
         is_notified=False,
     )
-    notified_count = 0
-    for task in due_tasks:
-        chat_id = _extract_chat_id_from_username(task.user.username)
-        if not chat_id:
-            logger.info(
-                "Пропуск уведомления: у пользователя %s нет Telegram ID в username",
-                task.user.username,
+    if task_ids is not None:
+        queryset = queryset.filter(id__in=task_ids)
+    with transaction.atomic():
+        claimed_ids = list(
+            queryset.select_for_update(skip_locked=True)
+            .order_by("due_date")
+            .values_list("id", flat=True)[:limit]
+        )
+        if claimed_ids:
+            Task.objects.filter(id__in=claimed_ids).update(
+                notification_claimed_until=claimed_at
+                + timedelta(seconds=settings.NOTIFY_CLAIM_LEASE_SECONDS)
             )
-            continue
+    return claimed_ids
+
 
-        due_text = task.due_date.astimezone().strftime("%d.%m.%Y %H:%M") if task.due_date else "-"
-        category = task.category.name if task.category else "Без категории"
-        text = (
-            "🔔 Напоминание по задаче\n\n"
-            f"📝 Название: {task.title}\n"
-            f"📁 Категория: {category}\n"
-            f"📅 Дедлайн: {due_text}"
+def _release_claims(task_ids: list[int]) -> None:
+    """Снимает аренду с недоставленных задач, чтобы их взял следующий прогон."""
+    chunk_size = settings.NOTIFY_MARK_CHUNK_SIZE
+    for start in range(0, len(task_ids), chunk_size):
+        Task.objects.filter(id__in=task_ids[start:start + chunk_size], is_notified=False).update(
+            notification_claimed_until=None
         )
 
-        reply_markup = {
-            "inline_keyboard": [[
-                {"text": "✅ Ок", "callback_data": "notification_ok"}
-            ]]
-        }
 
-        sent = _send_telegram_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
-        if not sent:
+def _deliver_claimed(task_ids: list[int], now, limiter: RateLimiter) -> DeliveryReport:
+    """Отправляет уведомления по захваченным задачам и помечает доставленные."""
+    claimed_tasks = (
+        Task.objects.select_related("category")
+        .annotate(chat_id=F("user__telegram_profile__telegram_id"))
+        .filter(id__in=task_ids)
+    )
+    tasks_by_id: dict[int, Task] = {}
+    messages: list[OutgoingMessage] = []
+    for task in claimed_tasks:
+        if task.chat_id is None:
+            logger.info(
+                "Пропуск уведомления: у пользователя %s нет Telegram-профиля", task.user_id
+            )
             continue
+        tasks_by_id[task.id] = task
+        messages.append(_build_notification(task, task.chat_id))
+
+    pending_marks: list[int] = []
 
+    def flush_marks() -> None:
+        if pending_marks:
+            _mark_notified(pending_marks, now)
+            pending_marks.clear()
+
+    def on_result(message: OutgoingMessage, sent: bool) -> None:
+        task = tasks_by_id[message.task_id]
+        if not sent:
+            logger.warning("Уведомление не доставлено, повтор в следующем прогоне | task_id=%s", task.id)
+            return
         logger.info(
-            "Отправлено уведомление | task_id=%s user=%s title=%s due_date=%s",
+            "Отправлено уведомление | task_id=%s chat_id=%s title=%s due_date=%s",
             task.id,
-            task.user.username,
+            message.chat_id,
             task.title,
             task.due_date.isoformat() if task.due_date else None,
         )
-        task.is_notified = True
-        task.notification_sent_at = now
-        task.save(update_fields=["is_notified", "notification_sent_at"])
-        notified_count += 1
-    return notified_count
+        # Отметки сбрасываются в БД по мере отправки, чтобы падение прогона
+        # не приводило к повторной рассылке уже доставленных уведомлений.
+        pending_marks.append(task.id)
+        if len(pending_marks) >= settings.NOTIFY_MARK_CHUNK_SIZE:
+            flush_marks()
+
+    try:
+        return deliver(
+            messages,
+            _send_telegram_message,
+            workers=settings.TELEGRAM_DELIVERY_WORKERS,
+            limiter=limiter,
+            on_result=on_result,
+        )
+    finally:
+        flush_marks()
+
+
+def _notify_due_tasks(task_ids: list[int] | None = None) -> int:
+    """Захватывает пачки задач с наступившим дедлайном и рассылает уведомления."""
+    now = timezone.now()
+    limiter = RateLimiter(
+        global_rate=settings.TELEGRAM_GLOBAL_RATE,
+        per_chat_interval=settings.TELEGRAM_PER_CHAT_INTERVAL,
+    )
+    total = DeliveryReport()
+    undelivered: list[int] = []
+    started_at = time.monotonic()
+    try:
+        while True:
+            claimed_ids = _claim_due_tasks(now, settings.NOTIFY_CLAIM_CHUNK_SIZE, task_ids)
+            if not claimed_ids:
+                break
+            report = _deliver_claimed(claimed_ids, now, limiter)
+            total.sent.extend(report.sent)
+            total.failed.extend(report.failed)
+            delivered = set(report.sent)
+            undelivered.extend(task_id for task_id in claimed_ids if task_id not in delivered)
+    finally:
+        _release_claims(undelivered)
+    total.elapsed = time.monotonic() - started_at
+    if total.sent or total.failed:
+        logger.info(
+            "Рассылка завершена | sent=%s failed=%s elapsed=%.2fs throughput=%.1f msg/s",
+            len(total.sent),
+            len(total.failed),
+            total.elapsed,
+            total.throughput,
+        )
+    return len(total.sent)
+
+
+@shared_task
+def send_due_task_notifications() -> int:
+    """Отправляет Telegram-уведомления по задачам с наступившим дедлайном."""
+    return _notify_due_tasks()
+
+
+@shared_task
+def send_task_notifications(task_ids: list[int]) -> int:
+    """Отправляет уведомления по конкретным задачам, у которых наступил дедлайн."""
+    return _notify_due_tasks(task_ids)
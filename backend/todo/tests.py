@@ -1,13 +1,62 @@
+import gzip
+import http.client
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
 from datetime import timedelta
+from types import SimpleNamespace
+from unittest import skipUnless
 from unittest.mock import patch
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from redis import Redis, RedisError
 from rest_framework.test import APIClient
 
-from .models import Category, Task
-from .tasks import send_due_task_notifications
+from .async_views import task_collection, task_detail
+from .cache import TTLCache
+from .delivery import OutgoingMessage, RateLimiter, deliver, telegram_api_post
+from .ids import (
+    MAX_PROCESS_SLOT,
+    MAX_SEQUENCE,
+    PROCESS_SHIFT,
+    TIMESTAMP_SHIFT,
+    SnowflakeGenerator,
+    configure_process,
+    lease_key,
+    next_id,
+    reserve_ids,
+)
+from .management.commands.run_deadline_scheduler import Command as DeadlineSchedulerCommand
+from .models import Category, ImportCheckpoint, Task, TelegramProfile
+from .redis_client import get_redis
+from .scheduler import DeadlineScheduler
+from .services import (
+    get_or_create_category_by_name,
+    get_or_create_user_by_telegram_id,
+    get_or_create_user_id_by_telegram_id,
+    get_user_id_by_telegram_id,
+    invalidate_category_cache,
+    invalidate_telegram_user_cache,
+    resolve_users_by_telegram_ids,
+)
+from .tasks import (
+    _claim_due_tasks,
+    _send_telegram_message,
+    send_due_task_notifications,
+    send_task_notifications,
+)
+from .versions import bump_task_versions
 
 
 class TaskApiTests(TestCase):
@@ -15,7 +64,7 @@ class TaskApiTests(TestCase):
 
     def setUp(self):
         self.client = APIClient()
-        self.user = User.objects.create(username="tg_1001")
+        self.user = get_or_create_user_by_telegram_id("1001")
         self.category = Category.objects.create(name="Work")
 
     def test_create_task_with_telegram_id(self):
@@ -32,15 +81,686 @@ class TaskApiTests(TestCase):
         self.assertEqual(Task.objects.count(), 1)
         task = Task.objects.first()
         self.assertEqual(task.user.username, "tg_1001")
+        self.assertEqual(TelegramProfile.objects.get(user=task.user).telegram_id, 1001)
+
+    def test_create_task_for_new_telegram_user_creates_profile(self):
+        response = self.client.post(
+            "/api/tasks/", {"title": "First", "telegram_id": "7007"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        profile = TelegramProfile.objects.select_related("user").get(telegram_id=7007)
+        self.assertEqual(profile.user.username, "tg_7007")
 
     def test_filter_tasks_by_telegram_id(self):
         Task.objects.create(title="Mine", user=self.user, category=self.category)
-        other_user = User.objects.create(username="tg_9999")
+        other_user = get_or_create_user_by_telegram_id("9999")
         Task.objects.create(title="Not mine", user=other_user, category=self.category)
         response = self.client.get("/api/tasks/?telegram_id=1001")
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 1)
-        self.assertEqual(response.json()[0]["title"], "Mine")
+        results = response.json()["results"]
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["title"], "Mine")
+
+    def test_list_rows_match_task_serializer(self):
+        task = Task.objects.create(
+            title="Mine",
+            user=self.user,
+            category=self.category,
+            due_date=timezone.now() + timedelta(days=1),
+        )
+        Task.objects.create(title="No category", user=self.user)
+        response = self.client.get("/api/tasks/?telegram_id=1001")
+        results = response.json()["results"]
+        detail = self.client.get(f"/api/tasks/{task.id}/").json()
+        self.assertEqual(results[0], detail)
+        self.assertIsNone(results[1]["category"])
+        self.assertIsNone(results[1]["category_name"])
+
+    def test_list_fields_param_selects_columns(self):
+        Task.objects.create(title="Mine", user=self.user, category=self.category)
+        response = self.client.get("/api/tasks/?telegram_id=1001&fields=title,category_name")
+        self.assertEqual(response.status_code, 200)
+        row = response.json()["results"][0]
+        self.assertEqual(list(row), ["id", "title", "category_name"])
+        self.assertEqual(row["category_name"], "Work")
+
+        response = self.client.get("/api/tasks/?fields=title,password")
+        self.assertEqual(response.status_code, 400)
+
+    def test_filter_by_unknown_or_invalid_telegram_id_returns_nothing(self):
+        Task.objects.create(title="Mine", user=self.user)
+        for telegram_id in ("4242", "abc"):
+            response = self.client.get(f"/api/tasks/?telegram_id={telegram_id}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["results"], [])
+
+    def test_detail_operations_are_scoped_by_telegram_id(self):
+        task = Task.objects.create(title="Mine", user=self.user)
+        url = f"/api/tasks/{task.id}/?telegram_id=1001"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Mine")
+
+        response = self.client.patch(url, {"title": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Renamed")
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Task.objects.filter(id=task.id).exists())
+
+    def test_detail_operations_return_404_for_foreign_task(self):
+        other_user = get_or_create_user_by_telegram_id("9999")
+        task = Task.objects.create(title="Not mine", user=other_user)
+        url = f"/api/tasks/{task.id}/?telegram_id=1001"
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(
+            self.client.patch(url, {"title": "Hacked"}, format="json").status_code, 404
+        )
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        task.refresh_from_db()
+        self.assertEqual(task.title, "Not mine")
+
+    def test_tasks_list_is_cursor_paginated_by_id(self):
+        created = [
+            Task.objects.create(title=f"Task {i}", user=self.user).id for i in range(5)
+        ]
+        response = self.client.get("/api/tasks/?telegram_id=1001&page_size=2")
+        self.assertEqual(response.status_code, 200)
+        seen = []
+        pages = 0
+        while True:
+            payload = response.json()
+            self.assertLessEqual(len(payload["results"]), 2)
+            seen.extend(item["id"] for item in payload["results"])
+            pages += 1
+            if not payload["next"]:
+                break
+            response = self.client.get(payload["next"])
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, sorted(created))
+
+
+class TaskListConditionalGetTests(TestCase):
+    """Тесты ETag и ответов 304 для списка задач пользователя."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_or_create_user_by_telegram_id("1001")
+        # Redis-копия версии публикуется после коммита.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task = Task.objects.create(title="Mine", user=self.user)
+        self.url = "/api/tasks/?telegram_id=1001"
+
+    def _version(self) -> int:
+        return TelegramProfile.objects.get(user=self.user).tasks_version
+
+    def test_unchanged_list_returns_304_without_list_query(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.settings(TASK_LIST_CACHE_TTL=0), self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertNotEqual(self.client.get(self.url + "&page_size=1")["ETag"], etag)
+
+    def test_task_writes_change_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f"/api/tasks/{self.task.id}/?telegram_id=1001", {"title": "Renamed"}, format="json"
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["title"], "Renamed")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_bulk_category_and_notification_writes_bump_version(self):
+        version = self._version()
+        self.client.post(
+            "/api/tasks/bulk/", [{"title": f"T{i}", "telegram_id": "1001"} for i in range(3)],
+            format="json",
+        )
+        self.assertEqual(self._version(), version + 1)
+
+        category = Category.objects.create(name="Work")
+        Task.objects.filter(id=self.task.id).update(category=category)
+        version = self._version()
+        category.name = "Home"
+        category.save()
+        self.assertEqual(self._version(), version + 1)
+        category.delete()
+        self.assertEqual(self._version(), version + 2)
+
+        Task.objects.filter(id=self.task.id).update(due_date=timezone.now())
+        with patch("todo.tasks._send_telegram_message", return_value=True):
+            send_due_task_notifications()
+        self.assertEqual(self._version(), version + 3)
+
+    def test_moving_task_bumps_both_owners(self):
+        other = get_or_create_user_by_telegram_id("9999")
+        versions = self._version(), TelegramProfile.objects.get(user=other).tasks_version
+        self.task.user = other
+        self.task.save()
+        self.assertEqual(self._version(), versions[0] + 1)
+        self.assertEqual(TelegramProfile.objects.get(user=other).tasks_version, versions[1] + 1)
+
+
+class TaskListResponseCacheTests(TestCase):
+    """Тесты Redis-кеша ответов списка задач."""
+
+    def setUp(self):
+        try:
+            get_redis().ping()
+        except RedisError:
+            self.skipTest("Redis недоступен")
+        override = self.settings(TASK_LIST_CACHE_PREFIX="todo:test-tasks")
+        override.enable()
+        self.addCleanup(override.disable)
+        for key in get_redis().scan_iter("todo:test-tasks:*"):
+            get_redis().delete(key)
+        self.client = APIClient()
+        self.user = get_or_create_user_by_telegram_id("1001")
+        self.task = Task.objects.create(title="Mine", user=self.user)
+        self.url = "/api/tasks/?telegram_id=1001"
+
+    def test_warm_list_is_served_from_redis_without_queries(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(
+            self.client.get("/api/tasks/cache-stats/").json(),
+            {"hits": 2, "misses": 1, "hit_ratio": 2 / 3},
+        )
+
+    def test_version_is_published_after_commit(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(2):
+            bump_task_versions([self.user.id])
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "MISS")
+
+    def test_failed_version_publish_is_not_served_stale(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Task.objects.filter(id=self.task.id).update(title="Renamed")
+            bump_task_versions([self.user.id])
+        with patch("redis.client.Pipeline.execute", side_effect=RedisError("down")):
+            with self.assertLogs("todo.response_cache", "WARNING"):
+                for callback in callbacks:
+                    callback()
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["title"], "Renamed")
+
+    def test_writes_invalidate_cached_pages(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f"/api/tasks/{self.task.id}/?telegram_id=1001", {"title": "Renamed"}, format="json"
+            )
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["title"], "Renamed")
+
+        Task.objects.filter(id=self.task.id).update(due_date=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            with patch("todo.tasks._send_telegram_message", return_value=True):
+                send_due_task_notifications()
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertTrue(response.json()["results"][0]["is_notified"])
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+
+
+class AsyncTaskViewTests(TestCase):
+    """Тесты асинхронных обработчиков задач: ответы совпадают с TaskViewSet."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.factory = AsyncRequestFactory()
+        self.user = get_or_create_user_by_telegram_id("1001")
+        self.category = Category.objects.create(name="Work")
+        self.task = Task.objects.create(
+            title="Mine", user=self.user, category=self.category, due_date=timezone.now()
+        )
+        Task.objects.create(title="Second", user=self.user)
+
+    @override_settings(TASK_LIST_CACHE_TTL=0)
+    async def test_list_matches_sync_viewset(self):
+        url = "/api/tasks/?telegram_id=1001&page_size=1"
+        expected = await sync_to_async(self.client.get)(url)
+        response = await task_collection(self.factory.get(url))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response["ETag"], expected["ETag"])
+        not_modified = await task_collection(
+            self.factory.get(url, headers={"if-none-match": response["ETag"]})
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    async def test_retrieve_is_scoped_by_telegram_id(self):
+        expected = await sync_to_async(self.client.get)(f"/api/tasks/{self.task.id}/")
+        response = await task_detail(
+            self.factory.get(f"/api/tasks/{self.task.id}/?telegram_id=1001"), pk=self.task.id
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), expected.json())
+        response = await task_detail(
+            self.factory.get(f"/api/tasks/{self.task.id}/?telegram_id=9999"), pk=self.task.id
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_create_resolves_telegram_user(self):
+        response = await task_collection(
+            self.factory.post(
+                "/api/tasks/",
+                {"title": "Async", "telegram_id": "7007", "category_id": self.category.id},
+                content_type="application/json",
+            )
+        )
+        self.assertEqual(response.status_code, 201)
+        body = json.loads(response.content)
+        self.assertEqual(body["category"], {"id": self.category.id, "name": "Work"})
+        task = await Task.objects.select_related("user").aget(id=body["id"])
+        self.assertEqual(task.user.username, "tg_7007")
+
+        response = await task_collection(
+            self.factory.post("/api/tasks/", {"telegram_id": "7007"}, content_type="application/json")
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("title", json.loads(response.content))
+
+
+class TaskExportTests(TestCase):
+    """Тесты потоковой выгрузки задач в CSV и NDJSON."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_or_create_user_by_telegram_id("1001")
+        self.category = Category.objects.create(name="Работа")
+        now = timezone.now()
+        self.early = Task.objects.create(
+            title="Early", user=self.user, category=self.category, due_date=now
+        )
+        self.late = Task.objects.create(
+            title='Late, "quoted"',
+            user=self.user,
+            category=self.category,
+            due_date=now + timedelta(days=2),
+        )
+        Task.objects.create(title="No category", user=self.user)
+        Task.objects.create(title="Foreign", user=get_or_create_user_by_telegram_id("2002"))
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get(
+            "/api/tasks/export/",
+            {"telegram_id": 1001, "category": self.category.id, "fields": "title,category"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(
+            body.splitlines(),
+            [
+                "id,title,category",
+                f"{self.early.id},Early,{self.category.id}",
+                f'{self.late.id},"Late, ""quoted""",{self.category.id}',
+            ],
+        )
+
+    def test_ndjson_export_filters_by_due_range(self):
+        response = self.client.get(
+            "/api/tasks/export/",
+            {
+                "format": "ndjson",
+                "user": self.user.id,
+                "due_from": (self.early.due_date + timedelta(days=1)).isoformat(),
+            },
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.late.id])
+        self.assertEqual(rows[0]["category"], {"id": self.category.id, "name": "Работа"})
+
+    def test_invalid_filter_returns_400(self):
+        response = self.client.get("/api/tasks/export/", {"due_to": "tomorrow"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("due_to", json.loads(response.content))
+
+    async def test_export_under_asgi_streams_async_iterator(self):
+        response = await self.async_client.get("/api/tasks/export/?format=ndjson&telegram_id=1001")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        rows = [line async for chunk in response.streaming_content for line in chunk.splitlines()]
+        self.assertEqual(len(rows), 3)
+
+
+class TaskBulkApiTests(TestCase):
+    """Тесты пакетного создания, обновления и удаления задач."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_or_create_user_by_telegram_id("1001")
+        self.category = Category.objects.create(name="Work")
+
+    def test_bulk_create_reports_errors_per_item(self):
+        payload = [
+            {"title": "One", "telegram_id": "1001", "category_id": self.category.id},
+            {"title": "Two", "telegram_id": "8008"},
+            {"telegram_id": "1001"},
+            {"title": "Bad category", "telegram_id": "1001", "category_id": 1},
+            {"title": "Three", "user": self.user.id, "due_date": "2030-01-01T10:00:00Z"},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/tasks/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        task_inserts = [
+            q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "todo_task"')
+        ]
+        self.assertEqual(len(task_inserts), 1)
+        body = response.json()
+        self.assertEqual(len(body["created"]), 3)
+        self.assertEqual([error["index"] for error in body["errors"]], [2, 3])
+        self.assertIn("title", body["errors"][0]["errors"])
+        self.assertIn("category_id", body["errors"][1]["errors"])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 2)
+        self.assertTrue(TelegramProfile.objects.filter(telegram_id=8008).exists())
+
+    def test_bulk_update_is_scoped_by_telegram_id(self):
+        mine = Task.objects.create(title="Mine", user=self.user)
+        other = Task.objects.create(
+            title="Other", user=get_or_create_user_by_telegram_id("9999")
+        )
+        response = self.client.patch(
+            "/api/tasks/bulk/?telegram_id=1001",
+            [
+                {"id": mine.id, "title": "Renamed", "category_id": self.category.id},
+                {"id": other.id, "title": "Hacked"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], [mine.id])
+        self.assertEqual(response.json()["errors"][0]["index"], 1)
+        mine.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((mine.title, mine.category_id), ("Renamed", self.category.id))
+        self.assertEqual(other.title, "Other")
+
+    def test_bulk_delete(self):
+        tasks = [Task.objects.create(title=f"T{i}", user=self.user) for i in range(3)]
+        response = self.client.delete(
+            "/api/tasks/bulk/?telegram_id=1001",
+            [tasks[0].id, tasks[1].id, 123, "x"],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["deleted"], [tasks[0].id, tasks[1].id])
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [2, 3])
+        self.assertEqual(list(Task.objects.values_list("id", flat=True)), [tasks[2].id])
+
+    def test_bulk_rejects_non_list_payload(self):
+        response = self.client.post("/api/tasks/bulk/", {"title": "x"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class ImportTasksCommandTests(TestCase):
+    """Тесты команды import_tasks: разрешение пользователей и категорий, контрольные точки."""
+
+    def setUp(self):
+        self.user = get_or_create_user_by_telegram_id("1001")
+        self.category = Category.objects.create(name="Работа")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _write(self, name: str, text: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as stream:
+            stream.write(text)
+        return path
+
+    def _import(self, path: str, *args) -> str:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("import_tasks", path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue() + stderr.getvalue()
+
+    def test_copy_requires_postgresql(self):
+        path = self._write("tasks.csv", "telegram_id,title\n1001,Task\n")
+        with patch.object(connection, "vendor", "sqlite"):
+            with self.assertRaisesMessage(CommandError, "--method copy"):
+                self._import(path, "--method", "copy")
+        self.assertFalse(Task.objects.filter(title="Task").exists())
+
+    @skipUnless(connection.vendor == "postgresql", "COPY есть только в PostgreSQL")
+    def test_csv_import_resolves_users_and_categories(self):
+        path = self._write(
+            "tasks.csv",
+            "telegram_id,title,category_name,due_date\n"
+            "1001,Existing user,работа,2030-01-01T10:00:00+00:00\n"
+            "3003,New user,Дом,\n"
+            "3003,,Дом,\n"
+            "3003,Bad date,,tomorrow\n",
+        )
+        output = self._import(path, "--method", "copy", "--chunk-size", "2")
+
+        self.assertIn("строка 4: title", output)
+        self.assertIn("строка 5: due_date", output)
+        existing = Task.objects.get(title="Existing user")
+        self.assertEqual((existing.user_id, existing.category_id), (self.user.id, self.category.id))
+        self.assertEqual(existing.due_date.year, 2030)
+        created = Task.objects.select_related("user", "category").get(title="New user")
+        self.assertEqual(created.user.username, "tg_3003")
+        self.assertEqual(created.user.telegram_profile.telegram_id, 3003)
+        self.assertEqual(created.category.name, "Дом")
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_ndjson_gzip_import_accepts_export_format(self):
+        path = self._write(
+            "tasks.ndjson.gz",
+            json.dumps({"user": self.user.id, "title": "A", "category": {"id": self.category.id}})
+            + "\n"
+            + json.dumps({"user": self.user.id, "title": "B", "is_notified": True})
+            + "\nnot json\n"
+            + json.dumps({"user": 999999, "title": "Unknown user"})
+            + "\n",
+        )
+        self._import(path, "--method", "insert")
+
+        self.assertEqual(
+            list(Task.objects.order_by("title").values_list("title", "category_id", "is_notified")),
+            [("A", self.category.id, False), ("B", None, True)],
+        )
+        checkpoint = ImportCheckpoint.objects.get()
+        self.assertEqual((checkpoint.rows_done, checkpoint.rows_skipped), (4, 2))
+        self.assertIsNotNone(checkpoint.finished_at)
+
+    def test_import_resumes_from_checkpoint(self):
+        path = self._write(
+            "tasks.ndjson",
+            "".join(json.dumps({"telegram_id": 1001, "title": f"T{i}"}) + "\n" for i in range(5)),
+        )
+        with patch("todo.importer.bump_task_versions", side_effect=[None, RuntimeError("boom")]):
+            with self.assertRaises(RuntimeError):
+                self._import(path, "--chunk-size", "2")
+        # Вторая порция откатилась вместе со сдвигом контрольной точки.
+        self.assertEqual(ImportCheckpoint.objects.get().rows_done, 2)
+        self.assertEqual(Task.objects.count(), 2)
+
+        output = self._import(path, "--chunk-size", "2")
+        self.assertIn("Продолжение с записи 3", output)
+        self.assertEqual(sorted(Task.objects.values_list("title", flat=True)), [f"T{i}" for i in range(5)])
+        self.assertIn("уже импортирован", self._import(path))
+        self.assertEqual(Task.objects.count(), 5)
+
+
+class CategoryApiTests(TestCase):
+    """Тесты поиска-или-создания категорий по имени."""
+
+    def setUp(self):
+        self.client = APIClient()
+        invalidate_category_cache()
+
+    def test_resolve_creates_then_reuses_case_insensitively(self):
+        response = self.client.post("/api/categories/resolve/", {"name": " Work "}, format="json")
+        self.assertEqual(response.status_code, 201)
+        category_id = response.json()["id"]
+        self.assertEqual(response.json()["name"], "Work")
+
+        with self.assertNumQueries(0):
+            response = self.client.post("/api/categories/resolve/", {"name": "WORK"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], category_id)
+        self.assertEqual(Category.objects.count(), 1)
+
+    def test_task_writes_check_category_in_db_and_reads_use_cache(self):
+        user = get_or_create_user_by_telegram_id("1002")
+        category = Category.objects.create(name="Errands")
+        self.client.get(f"/api/categories/{category.id}/")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(f"/api/categories/{category.id}/").status_code, 200)
+
+        payload = {"title": "Buy milk", "category_id": category.id, "user": user.id}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/tasks/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["category"]["name"], "Errands")
+        category_queries = [q for q in queries.captured_queries if 'FROM "todo_category"' in q["sql"]]
+        self.assertEqual(len(category_queries), 1)
+
+        category.delete()
+        response = self.client.post("/api/tasks/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("category_id", response.json())
+
+    def test_category_deleted_in_another_process_gives_400(self):
+        user = get_or_create_user_by_telegram_id("1002")
+        category = Category.objects.create(name="Errands")
+        task = Task.objects.create(title="Existing", user=user)
+        payload = {"title": "Warm", "category_id": category.id, "user": user.id}
+        self.client.post("/api/tasks/", payload, format="json")
+        # Удаление в другом воркере: сигнал этого процесса кеш не сбрасывает.
+        with patch("todo.signals.invalidate_category_cache"):
+            Category.objects.filter(id=category.id).delete()
+
+        payload["title"] = "Stale"
+        response = self.client.post("/api/tasks/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("category_id", response.json())
+        self.assertFalse(Task.objects.filter(title="Stale").exists())
+
+        response = self.client.patch(
+            f"/api/tasks/{task.id}/", {"category_id": category.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("category_id", response.json())
+
+    def test_get_or_create_category_survives_concurrent_delete(self):
+        existing = Category.objects.create(name="Home")
+        with patch(
+            "todo.services.find_category_by_name", side_effect=[None, None, existing]
+        ):
+            self.assertEqual(get_or_create_category_by_name("Home"), (existing, False))
+
+    def test_create_rejects_case_insensitive_duplicate(self):
+        Category.objects.create(name="Home")
+        response = self.client.post("/api/categories/", {"name": "home"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class TelegramUserResolutionTests(TestCase):
+    """Тесты пакетного разрешения Telegram ID в пользователей и кеша связей."""
+
+    def setUp(self):
+        self.client = APIClient()
+        invalidate_telegram_user_cache()
+        self.addCleanup(invalidate_telegram_user_cache)
+        self.existing = get_or_create_user_by_telegram_id("1001")
+
+    def test_batch_resolves_existing_and_creates_missing(self):
+        with CaptureQueriesContext(connection) as queries:
+            user_ids = resolve_users_by_telegram_ids(["1001", 3003, "3004", 3003])
+        profile_selects = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "todo_telegramprofile"."telegram_id"')
+        ]
+        # Один IN-запрос по всем ID и один повторный по созданным.
+        self.assertEqual(len(profile_selects), 2)
+        self.assertEqual(user_ids[1001], self.existing.id)
+        created = User.objects.get(id=user_ids[3003])
+        self.assertEqual((created.username, created.last_name), ("tg_3003", "3003"))
+        self.assertEqual(created.telegram_profile.telegram_id, 3003)
+        self.assertEqual(set(user_ids), {1001, 3003, 3004})
+
+    def test_bulk_uses_cache_and_re_resolves_deleted_users(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            stale_id = resolve_users_by_telegram_ids([1001])[1001]
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_users_by_telegram_ids(["1001"]), {1001: stale_id})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/tasks/bulk/", [{"title": "Cached", "telegram_id": "1001"}], format="json"
+            )
+        self.assertEqual(response.json()["errors"], [])
+        self.assertEqual(Task.objects.get(title="Cached").user_id, stale_id)
+        profile_lookups = [
+            query for query in queries.captured_queries
+            if '"todo_telegramprofile"."user_id" FROM' in query["sql"]
+        ]
+        self.assertEqual(profile_lookups, [])
+
+        # Удаление в другом воркере: сигнал этого процесса кеш не трогает.
+        with patch("todo.signals.forget_telegram_user"):
+            User.objects.filter(id=stale_id).delete()
+        response = self.client.post(
+            "/api/tasks/bulk/", [{"title": "After delete", "telegram_id": "1001"}], format="json"
+        )
+        self.assertEqual(response.json()["errors"], [])
+        user_id = Task.objects.get(title="After delete").user_id
+        self.assertNotEqual(user_id, stale_id)
+        self.assertEqual(get_user_id_by_telegram_id(1001), user_id)
+
+    def test_create_recreates_user_deleted_in_another_process(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            stale_id = resolve_users_by_telegram_ids([1001])[1001]
+        # Удаление в другом воркере: сигнал этого процесса кеш не трогает.
+        with patch("todo.signals.forget_telegram_user"):
+            User.objects.filter(id=stale_id).delete()
+        self.assertIsNone(get_user_id_by_telegram_id(1001))
+
+        response = self.client.post(
+            "/api/tasks/", {"title": "After delete", "telegram_id": "1001"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotEqual(response.json()["user"], stale_id)
+        self.assertEqual(get_user_id_by_telegram_id(1001), response.json()["user"])
+
+    def test_rolled_back_and_deleted_users_are_not_cached(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                get_or_create_user_id_by_telegram_id("3003")
+                raise RuntimeError
+        with self.captureOnCommitCallbacks(execute=True):
+            user_id = get_or_create_user_id_by_telegram_id("3003")
+        self.assertTrue(User.objects.filter(id=user_id).exists())
+
+        User.objects.filter(id=user_id).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            recreated = get_or_create_user_id_by_telegram_id("3003")
+        self.assertNotEqual(recreated, user_id)
+        self.assertTrue(User.objects.filter(id=recreated).exists())
 
 
 class CeleryNotificationTests(TestCase):
@@ -48,7 +768,7 @@ class CeleryNotificationTests(TestCase):
 
     @patch("todo.tasks._send_telegram_message", return_value=True)
     def test_due_tasks_are_marked_notified(self, mocked_sender):
-        user = User.objects.create(username="tg_2002")
+        user = get_or_create_user_by_telegram_id("2002")
         task = Task.objects.create(
             title="Overdue",
             user=user,
@@ -60,3 +780,554 @@ class CeleryNotificationTests(TestCase):
         self.assertTrue(task.is_notified)
         self.assertIsNotNone(task.notification_sent_at)
         mocked_sender.assert_called_once()
+
+    @patch("todo.tasks._send_telegram_message", side_effect=lambda chat_id, text, markup: "Fail" not in text)
+    def test_marks_are_bulk_updated_and_failures_stay_pending(self, mocked_sender):
+        user = get_or_create_user_by_telegram_id("2003")
+        due = timezone.now() - timedelta(minutes=1)
+        sent = [Task.objects.create(title=f"Ok {i}", user=user, due_date=due) for i in range(5)]
+        failed = Task.objects.create(title="Fail", user=user, due_date=due)
+        with self.settings(NOTIFY_MARK_CHUNK_SIZE=2, TELEGRAM_PER_CHAT_INTERVAL=0), \
+                CaptureQueriesContext(connection) as queries:
+            processed = send_due_task_notifications()
+        self.assertEqual(processed, 5)
+        mark_updates = [
+            q["sql"] for q in queries.captured_queries
+            if q["sql"].startswith("UPDATE") and '"is_notified" = true' in q["sql"]
+        ]
+        # 5 доставленных задач помечаются тремя пачечными UPDATE.
+        self.assertEqual(len(mark_updates), 3)
+        self.assertEqual(
+            Task.objects.filter(id__in=[t.id for t in sent], is_notified=True).count(), 5
+        )
+        failed.refresh_from_db()
+        self.assertFalse(failed.is_notified)
+        self.assertIsNone(failed.notification_sent_at)
+
+    @patch("todo.tasks._send_telegram_message", return_value=True)
+    def test_users_without_telegram_profile_are_skipped(self, mocked_sender):
+        user = User.objects.create(username="admin")
+        task = Task.objects.create(
+            title="Web only", user=user, due_date=timezone.now() - timedelta(minutes=1)
+        )
+        self.assertEqual(send_due_task_notifications(), 0)
+        mocked_sender.assert_not_called()
+        task.refresh_from_db()
+        self.assertFalse(task.is_notified)
+
+    def test_claims_are_disjoint_and_expire(self):
+        user = get_or_create_user_by_telegram_id("2004")
+        now = timezone.now()
+        tasks = [
+            Task.objects.create(title=f"Due {i}", user=user, due_date=now - timedelta(minutes=i))
+            for i in range(5)
+        ]
+        first = _claim_due_tasks(now, 3)
+        second = _claim_due_tasks(now, 3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(_claim_due_tasks(now, 3), [])
+
+        Task.objects.filter(id=tasks[0].id).update(
+            notification_claimed_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(_claim_due_tasks(now, 3), [tasks[0].id])
+
+    @patch("todo.tasks._send_telegram_message", return_value=False)
+    def test_undelivered_claims_are_released(self, mocked_sender):
+        user = get_or_create_user_by_telegram_id("2005")
+        task = Task.objects.create(
+            title="Retry", user=user, due_date=timezone.now() - timedelta(minutes=1)
+        )
+        self.assertEqual(send_due_task_notifications(), 0)
+        task.refresh_from_db()
+        self.assertFalse(task.is_notified)
+        self.assertIsNone(task.notification_claimed_until)
+
+
+class ConcurrentClaimTests(TransactionTestCase):
+    """Параллельные прогоны делят очередь через SKIP LOCKED."""
+
+    def test_parallel_runs_send_each_task_once(self):
+        user = get_or_create_user_by_telegram_id("2006")
+        due = timezone.now() - timedelta(minutes=1)
+        Task.objects.bulk_create(
+            [Task(title=f"Due {i}", user=user, due_date=due) for i in range(40)]
+        )
+        sent_texts = []
+        lock = threading.Lock()
+
+        def fake_send(chat_id, text, reply_markup):
+            with lock:
+                sent_texts.append(text)
+            return True
+
+        def run():
+            try:
+                send_due_task_notifications()
+            finally:
+                connection.close()
+
+        with patch("todo.tasks._send_telegram_message", side_effect=fake_send), \
+                self.settings(NOTIFY_CLAIM_CHUNK_SIZE=5, TELEGRAM_PER_CHAT_INTERVAL=0):
+            threads = [threading.Thread(target=run) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(sent_texts), 40)
+        self.assertEqual(len(set(sent_texts)), 40)
+        self.assertEqual(Task.objects.filter(is_notified=True).count(), 40)
+
+
+class TelegramProfileMigrationTests(TransactionTestCase):
+    """Тест миграции, заполняющей Telegram-профили по username."""
+
+    migrate_from = [("todo", "0002_task_due_pending_idx")]
+    migrate_to = [("todo", "0003_telegramprofile")]
+
+    def test_backfill_from_tg_usernames(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        OldUser = old_apps.get_model("auth", "User")
+        tg_user = OldUser.objects.create(username="tg_5005")
+        OldUser.objects.create(username="tg_broken")
+        OldUser.objects.create(username="admin")
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        new_apps = executor.loader.project_state(self.migrate_to).apps
+        Profile = new_apps.get_model("todo", "TelegramProfile")
+        self.assertEqual(
+            list(Profile.objects.values_list("user_id", "telegram_id")), [(tg_user.id, 5005)]
+        )
+
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class DueNotificationIndexTests(TestCase):
+    """Проверка, что выборка beat идет по частичному индексу."""
+
+    def test_due_scan_uses_partial_index(self):
+        user = get_or_create_user_by_telegram_id("3003")
+        now = timezone.now()
+        Task.objects.bulk_create(
+            [
+                Task(
+                    title=f"Task {i}",
+                    user=user,
+                    due_date=now - timedelta(minutes=i),
+                    is_notified=i % 50 != 0,
+                )
+                for i in range(2000)
+            ]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE todo_task")
+        plan = Task.objects.filter(
+            due_date__isnull=False, due_date__lte=now, is_notified=False
+        ).explain()
+        self.assertIn("task_due_pending_idx", plan)
+
+
+class FakeClock:
+    """Управляемые часы для тестов ограничителя темпа."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeBotApiConnection:
+    """Соединение с Bot API: отвечает заданным статусом или падает с ошибкой после отправки."""
+
+    def __init__(
+        self,
+        error: Exception | None = None,
+        reused: bool = True,
+        status: int = 200,
+        body: bytes = b'{"ok": true}',
+    ):
+        self.sock = object() if reused else None
+        self.error = error
+        self.status = status
+        self.body = body
+        self.requests = 0
+
+    def connect(self) -> None:
+        self.sock = object()
+
+    def request(self, *args, **kwargs) -> None:
+        self.requests += 1
+
+    def getresponse(self):
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(status=self.status, will_close=False, read=lambda: self.body)
+
+    def close(self) -> None:
+        self.sock = None
+
+
+class DeliveryTests(TestCase):
+    """Тесты параллельной рассылки и лимитов Telegram."""
+
+    def test_closed_keep_alive_connection_is_retried(self):
+        stale = FakeBotApiConnection(http.client.RemoteDisconnected("closed"))
+        fresh = FakeBotApiConnection(reused=False)
+        with patch("todo.delivery._get_connection", side_effect=[stale, fresh]):
+            self.assertEqual(telegram_api_post("token", "sendMessage", {}), (200, {"ok": True}))
+        self.assertEqual((stale.requests, fresh.requests), (1, 1))
+
+    def test_flood_limit_pauses_all_sends(self):
+        clock = FakeClock()
+        limiter = RateLimiter(global_rate=1000, per_chat_interval=0, clock=clock, sleep=clock.sleep)
+        flooded = FakeBotApiConnection(
+            status=429, body=b'{"ok": false, "parameters": {"retry_after": 3}}'
+        )
+        with patch("todo.delivery._get_connection", return_value=flooded), \
+                patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "token"}), \
+                self.assertLogs("todo.delivery", "WARNING"):
+            report = deliver(
+                [OutgoingMessage(task_id=1, chat_id="1", text="hi")],
+                _send_telegram_message,
+                workers=1,
+                limiter=limiter,
+            )
+        self.assertEqual(report.failed, [1])
+        # Следующая отправка, в том числе в другой чат, ждет retry_after.
+        limiter.acquire("2")
+        self.assertGreaterEqual(clock.now, 3.0)
+
+    def test_request_that_may_have_been_delivered_is_not_retried(self):
+        for error, reused in (
+            (TimeoutError("timed out"), True),
+            (ConnectionResetError("reset"), False),
+        ):
+            connection = FakeBotApiConnection(error, reused=reused)
+            with patch("todo.delivery._get_connection", return_value=connection):
+                with self.assertRaises(OSError):
+                    telegram_api_post("token", "sendMessage", {})
+            self.assertEqual(connection.requests, 1)
+
+    def test_rate_limiter_respects_global_rate(self):
+        clock = FakeClock()
+        limiter = RateLimiter(global_rate=2, per_chat_interval=0, clock=clock, sleep=clock.sleep)
+        for chat_id in range(6):
+            limiter.acquire(str(chat_id))
+        # Два сообщения уходят сразу из запаса бакета, остальные по 0.5 с.
+        self.assertAlmostEqual(clock.now, 2.0)
+
+    def test_rate_limiter_respects_per_chat_interval(self):
+        clock = FakeClock()
+        limiter = RateLimiter(global_rate=100, per_chat_interval=1, clock=clock, sleep=clock.sleep)
+        limiter.acquire("1")
+        limiter.acquire("2")
+        self.assertAlmostEqual(clock.now, 0.0)
+        limiter.acquire("1")
+        self.assertGreaterEqual(clock.now, 1.0)
+
+    def test_deliver_reports_sent_and_failed(self):
+        messages = [
+            OutgoingMessage(task_id=i, chat_id=str(i % 3), text=f"msg {i}") for i in range(9)
+        ]
+        results = []
+        report = deliver(
+            messages,
+            lambda chat_id, text, reply_markup: not text.endswith("4"),
+            workers=4,
+            limiter=RateLimiter(global_rate=1000, per_chat_interval=0),
+            on_result=lambda message, ok: results.append((message.task_id, ok)),
+        )
+        self.assertEqual(sorted(report.sent), [0, 1, 2, 3, 5, 6, 7, 8])
+        self.assertEqual(report.failed, [4])
+        self.assertEqual(len(results), 9)
+        self.assertGreater(report.throughput, 0)
+
+
+class TTLCacheTests(TestCase):
+    """Тесты LRU-кеша с временем жизни записей."""
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+        cache.set("a", 1)
+        clock.sleep(4.9)
+        self.assertEqual(cache.get("a"), 1)
+        clock.sleep(0.2)
+        self.assertIsNone(cache.get("a"))
+
+
+class SteppingClock:
+    """Часы генератора ID: миллисекунда сдвигается после заданного числа чтений."""
+
+    def __init__(self, now: int, reads_per_ms: int):
+        self.now = now
+        self.reads_per_ms = reads_per_ms
+        self.reads = 0
+
+    def __call__(self) -> int:
+        self.reads += 1
+        if self.reads % self.reads_per_ms == 0:
+            self.now += 1
+        return self.now
+
+
+def _generate_ids(slot: int, threads: int, per_thread: int, conn) -> None:
+    configure_process(slot)
+    results = [[] for _ in range(threads)]
+    start = threading.Barrier(threads)
+
+    def worker(index: int) -> None:
+        start.wait()
+        results[index] = [next_id() for _ in range(per_thread)]
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    conn.send(results)
+    conn.close()
+
+
+class SnowflakeGeneratorTests(TestCase):
+    """Тесты генератора ID: счетчик, часы и уникальность между процессами."""
+
+    def test_sequence_exhaustion_waits_for_next_millisecond(self):
+        clock = SteppingClock(now=1_000, reads_per_ms=10_000)
+        generator = SnowflakeGenerator(1, 2, clock=clock)
+        ids = [generator.next_id() for _ in range(MAX_SEQUENCE + 2)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(ids[MAX_SEQUENCE] >> TIMESTAMP_SHIFT, 1_000)
+        self.assertEqual(ids[-1] >> TIMESTAMP_SHIFT, 1_001)
+        self.assertEqual(clock.now, 1_001)
+
+    def test_clock_regression_keeps_ids_increasing(self):
+        clock = FakeClock()
+        clock.now = 5_000
+        generator = SnowflakeGenerator(0, 0, clock=clock)
+        before = generator.next_id()
+        clock.now = 4_000
+        with self.assertLogs("todo.ids", "WARNING"):
+            after = [generator.next_id() for _ in range(MAX_SEQUENCE * 2)]
+        self.assertGreater(after[0], before)
+        self.assertEqual(after, sorted(set(after)))
+        # Счетчик исчерпан при отставших часах: миллисекунда берется логически, без ожидания.
+        self.assertEqual(after[-1] >> TIMESTAMP_SHIFT, 5_001)
+
+    def test_reserve_returns_contiguous_blocks_above_issued_ids(self):
+        generator = SnowflakeGenerator(0, 1, clock=SteppingClock(now=7_000, reads_per_ms=10_000))
+        issued = generator.next_id()
+        blocks = generator.reserve(MAX_SEQUENCE + 100)
+        self.assertEqual(len(blocks), 2)
+        self.assertEqual(sum(len(block) for block in blocks), MAX_SEQUENCE + 100)
+        self.assertGreater(blocks[0][0], issued)
+        self.assertGreater(blocks[1][0], blocks[0][-1])
+        self.assertGreater(generator.next_id(), blocks[1][-1])
+
+    def test_reserve_ids_does_not_overlap_next_id(self):
+        ids = [next_id(), *reserve_ids(500), next_id()]
+        self.assertEqual(ids, sorted(set(ids)))
+
+    @override_settings(ID_SLOT_LEASE_PREFIX="todo:test-ids")
+    def test_unique_across_processes_and_threads(self):
+        self.addCleanup(_delete_keys, "todo:test-ids:*")
+        context = multiprocessing.get_context("fork")
+        processes, threads, per_thread = 8, 4, 5_000
+        pipes, children = [], []
+        for _ in range(processes):
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            # Один подсказанный слот на всех, как у воркеров контейнеров с общим ID_NODE_ID.
+            child = context.Process(target=_generate_ids, args=(0, threads, per_thread, child_conn))
+            child.start()
+            pipes.append(parent_conn)
+            children.append(child)
+        batches = [batch for conn in pipes for batch in conn.recv()]
+        for child in children:
+            child.join()
+            self.assertEqual(child.exitcode, 0)
+
+        ids = [id_ for batch in batches for id_ in batch]
+        self.assertEqual(len(ids), processes * threads * per_thread)
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertLess(max(ids), 2**63)
+        for batch in batches:
+            self.assertEqual(batch, sorted(batch))
+        slots = {(id_ >> PROCESS_SHIFT) & MAX_PROCESS_SLOT for id_ in ids}
+        self.assertEqual(len(slots), processes)
+
+
+def _delete_keys(pattern: str) -> None:
+    client = get_redis()
+    for key in client.scan_iter(pattern):
+        client.delete(key)
+
+
+def _slot_of(id_: int) -> int:
+    return (id_ >> PROCESS_SHIFT) & MAX_PROCESS_SLOT
+
+
+class SlotLeaseTests(TestCase):
+    """Тесты аренды слотов генератора ID в Redis."""
+
+    def setUp(self):
+        try:
+            get_redis().ping()
+        except RedisError:
+            self.skipTest("Redis недоступен")
+        override = self.settings(ID_SLOT_LEASE_PREFIX="todo:test-ids", ID_SLOT_LEASE_TTL=1)
+        override.enable()
+        self.addCleanup(override.disable)
+        _delete_keys("todo:test-ids:*")
+        self.addCleanup(_delete_keys, "todo:test-ids:*")
+        # Первой из очистки отпускаем тестовую аренду, чтобы следующий ID взял обычную.
+        self.addCleanup(configure_process, 0)
+
+    def test_busy_slot_is_skipped(self):
+        get_redis().set(lease_key(0, 5), "other-container")
+        configure_process(5)
+        self.assertEqual(_slot_of(next_id()), 6)
+
+    def test_all_slots_busy_raises(self):
+        for slot in range(MAX_PROCESS_SLOT + 1):
+            get_redis().set(lease_key(0, slot), "other-container")
+        configure_process(0)
+        with self.assertRaisesMessage(RuntimeError, "слотов узла"):
+            next_id()
+
+    def test_lost_lease_switches_slot(self):
+        configure_process(7)
+        before = next_id()
+        self.assertEqual(_slot_of(before), 7)
+        get_redis().set(lease_key(0, 7), "other-container")
+        deadline = time.monotonic() + 3
+        with self.assertLogs("todo.ids", "ERROR"):
+            while _slot_of(next_id()) == 7 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        after = next_id()
+        self.assertEqual(_slot_of(after), 8)
+        self.assertGreater(after, before)
+
+    def test_ids_do_not_depend_on_redis(self):
+        unreachable = Redis(port=1, socket_connect_timeout=0.1)
+        with patch("todo.ids.get_redis", return_value=unreachable):
+            configure_process(9)
+            with self.assertLogs("todo.ids", "WARNING"):
+                first = next_id()
+                # Продление тоже падает, но слот остается за процессом.
+                time.sleep(0.5)
+            self.assertEqual(_slot_of(first), 9)
+            self.assertEqual(_slot_of(next_id()), 9)
+            self.assertIsNotNone(Category.objects.create(name="Без Redis").id)
+
+
+class DeadlineSchedulerTests(TestCase):
+    """Тесты кучи дедлайнов и ее питания от сигналов модели."""
+
+    def test_pop_due_respects_reschedule_and_cancel(self):
+        scheduler = DeadlineScheduler(clock=lambda: 0)
+        scheduler.schedule(1, 10.0)
+        scheduler.schedule(2, 5.0)
+        scheduler.schedule(3, 7.0)
+        scheduler.schedule(1, 20.0)
+        scheduler.cancel(3)
+        self.assertEqual(scheduler.next_deadline(), 5.0)
+        self.assertEqual(scheduler.pop_due(10.0), [2])
+        self.assertEqual(scheduler.pop_due(19.9), [])
+        self.assertEqual(scheduler.pop_due(20.0), [1])
+        self.assertEqual(len(scheduler), 0)
+        self.assertIsNone(scheduler.next_deadline())
+
+    def test_run_dispatches_at_deadline(self):
+        scheduler = DeadlineScheduler()
+        stop = threading.Event()
+        fired = []
+
+        def dispatch(task_ids):
+            fired.append((task_ids, time.time()))
+            stop.set()
+
+        due_ts = time.time() + 0.2
+        worker = threading.Thread(target=scheduler.run, args=(dispatch, stop))
+        worker.start()
+        scheduler.schedule(42, due_ts)
+        worker.join(timeout=5)
+        self.assertEqual(fired[0][0], [42])
+        self.assertGreaterEqual(fired[0][1], due_ts)
+        self.assertLess(fired[0][1] - due_ts, 0.5)
+
+    def test_run_survives_dispatch_error_and_retries(self):
+        scheduler = DeadlineScheduler(retry_delay=0.1)
+        stop = threading.Event()
+        calls = []
+
+        def dispatch(task_ids):
+            calls.append(task_ids)
+            if len(calls) == 1:
+                raise ConnectionError("broker is down")
+            stop.set()
+
+        scheduler.schedule(42, time.time())
+        worker = threading.Thread(target=scheduler.run, args=(dispatch, stop))
+        with self.assertLogs("todo.scheduler", level="ERROR"):
+            worker.start()
+            worker.join(timeout=5)
+        self.assertEqual(calls, [[42], [42]])
+
+    def test_malformed_events_are_skipped(self):
+        scheduler = DeadlineScheduler()
+        scheduler.schedule(7, time.time() + 60)
+        with self.assertLogs("todo.scheduler", level="WARNING") as logs:
+            for raw in (b"not json", b"[1]", b'{"due": 1}', b'{"id": 7, "due": "soon"}'):
+                DeadlineSchedulerCommand._apply(scheduler, raw, 3600)
+        self.assertEqual(len(logs.records), 4)
+        self.assertEqual(len(scheduler), 1)
+        DeadlineSchedulerCommand._apply(scheduler, b'{"id": 7, "due": null}', 3600)
+        self.assertEqual(len(scheduler), 0)
+
+    @patch("todo.signals.publish_deadline_changes")
+    def test_task_writes_publish_deadline_changes(self, mocked_publish):
+        user = get_or_create_user_by_telegram_id("4004")
+        due = timezone.now() + timedelta(hours=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title="Soon", user=user, due_date=due)
+        mocked_publish.assert_called_with([(task.id, due.timestamp())])
+
+        task_id = task.id
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        mocked_publish.assert_called_with([(task_id, None)])
+
+    @patch("todo.tasks._send_telegram_message", return_value=True)
+    def test_send_task_notifications_only_touches_given_tasks(self, mocked_sender):
+        user = get_or_create_user_by_telegram_id("4005")
+        due = timezone.now() - timedelta(seconds=1)
+        target = Task.objects.create(title="Target", user=user, due_date=due)
+        other = Task.objects.create(title="Other", user=user, due_date=due)
+        self.assertEqual(send_task_notifications([target.id]), 1)
+        target.refresh_from_db()
+        other.refresh_from_db()
+        self.assertTrue(target.is_notified)
+        self.assertFalse(other.is_notified)
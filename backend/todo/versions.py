@@ -0,0 +1,110 @@
+import hashlib
+import threading
+from collections.abc import Iterable
+from contextlib import contextmanager
+from datetime import datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+from .models import TelegramProfile
+from .response_cache import publish_task_versions
+
+_local = threading.local()
+
+
+class TaskListState(NamedTuple):
+    """Версия списка задач Telegram-пользователя."""
+
+    user_id: int
+    version: int
+    modified_at: datetime
+
+
+def get_task_list_state(telegram_id: int) -> TaskListState | None:
+    """Возвращает пользователя и версию его списка задач одним запросом к профилю."""
+    row = (
+        TelegramProfile.objects.filter(telegram_id=telegram_id)
+        .values_list("user_id", "tasks_version", "tasks_modified_at")
+        .first()
+    )
+    return TaskListState(*row) if row is not None else None
+
+
+async def aget_task_list_state(telegram_id: int) -> TaskListState | None:
+    """Асинхронный вариант `get_task_list_state` на async ORM."""
+    row = await (
+        TelegramProfile.objects.filter(telegram_id=telegram_id)
+        .values_list("user_id", "tasks_version", "tasks_modified_at")
+        .afirst()
+    )
+    return TaskListState(*row) if row is not None else None
+
+
+def task_list_digest(*parts: str, query: Iterable[tuple[str, str]]) -> str:
+    """Хеш параметров запроса списка: отличает страницы и представления одной версии."""
+    digest = hashlib.blake2s(digest_size=8)
+    for part in parts:
+        digest.update(f"{part}\n".encode())
+    for key, value in sorted(query):
+        digest.update(f"{key}={value}&".encode())
+    return digest.hexdigest()
+
+
+def task_list_etag(version: int, digest: str) -> str:
+    """ETag страницы списка задач."""
+    return f'"{version}-{digest}"'
+
+
+def _bump(profiles: QuerySet) -> None:
+    profiles.update(tasks_version=F("tasks_version") + 1, tasks_modified_at=timezone.now())
+    if settings.TASK_LIST_CACHE_TTL > 0:
+        # Версии только растут: если между UPDATE и чтением профиль поднял кто-то еще,
+        # опубликуется его, более новая версия.
+        versions = list(profiles.values_list("telegram_id", "tasks_version").distinct())
+        transaction.on_commit(lambda: publish_task_versions(versions))
+
+
+def bump_task_versions(user_ids: Iterable[int | None]) -> None:
+    """Увеличивает версию списка задач пользователей.
+
+    Вызывается после записи задач и в той же транзакции, поэтому новая
+    версия никогда не становится видна раньше новых данных; Redis-копия
+    версии обновляется после коммита, чтобы кеш ответов перестал совпадать.
+    Внутри `deferred_version_bumps()` пользователи копятся и обновляются разом.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    pending = getattr(_local, "pending", None)
+    if pending is not None:
+        pending.update(user_ids)
+        return
+    _bump(TelegramProfile.objects.filter(user_id__in=user_ids))
+
+
+def bump_task_versions_for_tasks(**task_filter) -> None:
+    """Увеличивает версии владельцев подходящих под фильтр задач одним UPDATE с подзапросом."""
+    _bump(
+        TelegramProfile.objects.filter(
+            **{f"user__tasks__{lookup}": value for lookup, value in task_filter.items()}
+        )
+    )
+
+
+@contextmanager
+def deferred_version_bumps():
+    """Копит изменения версий внутри блока и применяет их одним UPDATE в конце."""
+    if getattr(_local, "pending", None) is not None:
+        yield
+        return
+    _local.pending = set()
+    try:
+        yield
+        user_ids = _local.pending
+    finally:
+        _local.pending = None
+    bump_task_versions(user_ids)
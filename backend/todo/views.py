@@ -1,24 +1,239 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from redis import RedisError
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from .bulk import BulkPayloadError, bulk_create_tasks, bulk_delete_tasks, bulk_update_tasks
+from .export import CSVRenderer, NDJSONRenderer, aiter_chunks, iter_csv, iter_ndjson
 from .models import Category, Task
-from .serializers import CategorySerializer, TaskSerializer
+from .response_cache import (
+    CachedTaskList,
+    get_task_list_cache_stats,
+    lookup_task_list,
+    store_task_list,
+)
+from .serializers import (
+    CategoryResolveSerializer,
+    CategorySerializer,
+    TaskExportFilterSerializer,
+    TaskListRepresentation,
+    TaskSerializer,
+)
+from .services import get_category, get_or_create_category_by_name, parse_telegram_id
+from .versions import TaskListState, get_task_list_state, task_list_digest, task_list_etag
+
+
+def task_list_preconditions(
+    request, version: int, modified_at: int, digest: str
+) -> tuple[dict[str, str], HttpResponse | None]:
+    """Возвращает валидаторы страницы списка и готовый ответ 304, если клиентская копия актуальна."""
+    headers = {"ETag": task_list_etag(version, digest), "Cache-Control": "private, no-cache"}
+    # Last-Modified точен до секунды: отдаем его только после того, как секунда
+    # изменения прошла, иначе запись в ту же секунду осталась бы незамеченной.
+    if int(timezone.now().timestamp()) > modified_at:
+        headers["Last-Modified"] = http_date(modified_at)
+    return headers, get_conditional_response(
+        request, etag=headers["ETag"], last_modified=modified_at
+    )
+
 
 class TaskViewSet(ModelViewSet):
     """Операции создания, чтения, обновления и удаления задач с фильтрацией по Telegram."""
 
     serializer_class = TaskSerializer
-    queryset = Task.objects.select_related("category", "user").all()
+    queryset = Task.objects.select_related("category").all()
 
     def get_queryset(self):
-        """Фильтрует задачи по Telegram ID, если он передан в запросе."""
+        """Фильтрует задачи по Telegram ID, если он передан в запросе.
+
+        Фильтр действует и для детальных операций: `GET/PATCH/DELETE
+        /api/tasks/<id>/?telegram_id=...` отвечают 404, если задача
+        принадлежит другому пользователю.
+        """
         queryset = super().get_queryset()
-        telegram_id = self.request.query_params.get("telegram_id")
-        if telegram_id:
-            queryset = queryset.filter(user__username=f"tg_{telegram_id}")
+        if self.request.query_params.get("telegram_id"):
+            state = self.get_task_list_state()
+            if state is None:
+                return queryset.none()
+            queryset = queryset.filter(user_id=state.user_id)
         return queryset
 
+    def get_task_list_state(self) -> TaskListState | None:
+        """Профиль из `?telegram_id=` с версией списка задач; читается один раз за запрос."""
+        if not hasattr(self, "_task_list_state"):
+            telegram_id = parse_telegram_id(self.request.query_params.get("telegram_id", ""))
+            self._task_list_state = (
+                get_task_list_state(telegram_id) if telegram_id is not None else None
+            )
+        return self._task_list_state
+
+    def list(self, request, *args, **kwargs):
+        """Список задач из `.values()` с выбором полей через `?fields=id,title,...`.
+
+        Список пользователя из `?telegram_id=` отдается с ETag и Last-Modified
+        по версии его задач; при совпадении `If-None-Match`/`If-Modified-Since`
+        ответ 304 возвращается без запроса списка и сериализации. JSON-страницы
+        кешируются в Redis под версией пользователя: теплый запрос обходится
+        одним обращением к Redis без БД.
+        """
+        representation = TaskListRepresentation(
+            TaskListRepresentation.parse_fields(request.query_params.get("fields"))
+        )
+        if not request.query_params.get("telegram_id"):
+            return self._list_response(representation)
+
+        telegram_id = parse_telegram_id(request.query_params["telegram_id"])
+        digest = task_list_digest(
+            request.get_host(), request.accepted_renderer.format, query=request.query_params.items()
+        )
+        cacheable = (
+            telegram_id is not None
+            and settings.TASK_LIST_CACHE_TTL > 0
+            and request.accepted_renderer.format == "json"
+        )
+        cached = lookup_task_list(telegram_id, digest) if cacheable else None
+        if cached is not None:
+            return self._conditional_response(
+                request,
+                cached.version,
+                cached.modified_at,
+                digest,
+                lambda: self._cached_response(request, cached.body, "HIT"),
+            )
+
+        state = self.get_task_list_state()
+        if state is None:
+            return self._list_response(representation)
+        modified_at = int(state.modified_at.timestamp())
+
+        def build_response():
+            response = self._list_response(representation)
+            if not cacheable:
+                return response
+            body = request.accepted_renderer.render(
+                response.data, request.accepted_media_type, self.get_renderer_context()
+            )
+            store_task_list(telegram_id, digest, CachedTaskList(state.version, modified_at, body))
+            return self._cached_response(request, body, "MISS")
+
+        return self._conditional_response(
+            request, state.version, modified_at, digest, build_response
+        )
+
+    def _list_response(self, representation: TaskListRepresentation) -> Response:
+        rows = self.filter_queryset(self.get_queryset()).values(*representation.columns)
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(
+            [representation.to_representation(row) for row in page]
+        )
+
+    @staticmethod
+    def _cached_response(request, body: bytes, cache_status: str) -> HttpResponse:
+        response = HttpResponse(body, content_type=request.accepted_renderer.media_type)
+        response["X-Cache"] = cache_status
+        return response
+
+    @staticmethod
+    def _conditional_response(request, version: int, modified_at: int, digest: str, build):
+        """Отвечает 304 по ETag/Last-Modified либо строит ответ и добавляет к нему валидаторы."""
+        headers, response = task_list_preconditions(request, version, modified_at, digest)
+        if response is None:
+            response = build()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    @action(detail=False, methods=["get"], url_path="cache-stats")
+    def cache_stats(self, request):
+        """Счетчики попаданий и промахов Redis-кеша списков задач."""
+        try:
+            return Response(get_task_list_cache_stats())
+        except RedisError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    @action(detail=False, methods=["get"], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """Потоковая выгрузка задач в CSV (`?format=csv`, по умолчанию) или NDJSON (`?format=ndjson`).
+
+        Строки читаются серверным курсором порциями по API_EXPORT_CHUNK_SIZE и сразу
+        пишутся в ответ, поэтому память не зависит от числа задач. Фильтры:
+        `telegram_id`, `user`, `category`, `due_from`, `due_to`; поля — `fields=` как у списка.
+        """
+        filters = TaskExportFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        representation = TaskListRepresentation(
+            TaskListRepresentation.parse_fields(request.query_params.get("fields"))
+        )
+        rows = (
+            self.get_queryset()
+            .filter(**filters.to_queryset_filter())
+            .order_by("id")
+            .values(*representation.columns)
+            .iterator(chunk_size=settings.API_EXPORT_CHUNK_SIZE)
+        )
+        write = iter_csv if request.accepted_renderer.format == "csv" else iter_ndjson
+        chunks = write(rows, representation, settings.API_EXPORT_WRITE_ROWS)
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_chunks(chunks)
+        response = StreamingHttpResponse(
+            chunks, content_type=f"{request.accepted_renderer.media_type}; charset=utf-8"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="tasks.{request.accepted_renderer.format}"'
+        )
+        return response
+
+    @action(detail=False, methods=["post", "patch", "delete"])
+    def bulk(self, request):
+        """Пакетные операции над задачами.
+
+        POST принимает список задач, PATCH — список `{id, ...поля}`, DELETE — список ID.
+        Корректные элементы применяются, ошибки возвращаются по индексам элементов.
+        """
+        try:
+            if request.method == "POST":
+                ids, errors = bulk_create_tasks(request.data)
+                key = "created"
+            elif request.method == "PATCH":
+                ids, errors = bulk_update_tasks(self.get_queryset(), request.data)
+                key = "updated"
+            else:
+                ids, errors = bulk_delete_tasks(self.get_queryset(), request.data)
+                key = "deleted"
+        except BulkPayloadError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({key: ids, "errors": errors})
+
 class CategoryViewSet(ModelViewSet):
     """Эндпоинты создания, чтения, обновления и удаления категорий."""
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        """Отдает категорию из кеша, не обращаясь к БД при повторных запросах."""
+        try:
+            category = get_category(int(kwargs[self.lookup_field]))
+        except ValueError:
+            category = None
+        if category is None:
+            raise Http404
+        return Response(self.get_serializer(category).data)
+
+    @action(detail=False, methods=["post"])
+    def resolve(self, request):
+        """Возвращает категорию по имени без учета регистра или создает ее."""
+        serializer = CategoryResolveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        category, created = get_or_create_category_by_name(serializer.validated_data["name"])
+        return Response(
+            CategorySerializer(category).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
@@ -0,0 +1,286 @@
+import os
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import aiohttp
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from aiogram_dialog import DialogManager
+
+from cache import SingleFlight, TTLCache
+
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://backend:8000")
+BACKEND_POOL_LIMIT = int(os.environ.get("BACKEND_POOL_LIMIT", "100"))
+BACKEND_POOL_LIMIT_PER_HOST = int(os.environ.get("BACKEND_POOL_LIMIT_PER_HOST", "50"))
+CATEGORY_CACHE_SIZE = int(os.environ.get("CATEGORY_CACHE_SIZE", "1024"))
+CATEGORY_CACHE_TTL = float(os.environ.get("CATEGORY_CACHE_TTL", "300"))
+TASKS_CACHE_SIZE = int(os.environ.get("TASKS_CACHE_SIZE", "1024"))
+TASKS_CACHE_TTL = float(os.environ.get("TASKS_CACHE_TTL", "600"))
+TASKS_SNAPSHOT_SIZE = int(os.environ.get("TASKS_SNAPSHOT_SIZE", "1024"))
+TASKS_SNAPSHOT_TTL = float(os.environ.get("TASKS_SNAPSHOT_TTL", "30"))
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=12)
+TASKS_PAGE_SIZE = 10
+
+
+def _extract_cursor(url: Optional[str]) -> Optional[str]:
+    """Достает непрозрачный курсор из ссылки next/previous ответа API."""
+    if not url:
+        return None
+    values = parse_qs(urlsplit(url).query).get("cursor")
+    return values[0] if values else None
+
+
+@dataclass
+class TaskSnapshot:
+    """Задачи пользователя, уже полученные ботом: страницы списка по курсору и задачи по ID.
+
+    `generation` растет при каждом изменении задач через бота: ответ, запрошенный
+    до изменения, в снимок уже не записывается.
+    """
+
+    pages: dict[Optional[str], dict] = field(default_factory=dict)
+    tasks: dict[int, dict] = field(default_factory=dict)
+    generation: int = 0
+
+    def put_page(self, cursor: Optional[str], page: dict) -> None:
+        self.pages[cursor] = page
+        for task in page["results"]:
+            self.tasks[task["id"]] = task
+
+    def put_task(self, task: dict) -> None:
+        """Обновляет задачу и ее копии на закешированных страницах."""
+        self.tasks[task["id"]] = task
+        for page in self.pages.values():
+            page["results"] = [task if item["id"] == task["id"] else item for item in page["results"]]
+
+    def task_changed(self, task: dict) -> None:
+        """Учитывает задачу, измененную через API."""
+        self.generation += 1
+        self.put_task(task)
+
+    def reset_pages(self, removed_task_id: Optional[int] = None) -> None:
+        """Сбрасывает страницы после создания или удаления задачи: состав списка знает только API."""
+        self.generation += 1
+        self.pages.clear()
+        if removed_task_id is not None:
+            self.tasks.pop(removed_task_id, None)
+
+
+class BackendClient:
+    """Клиент API бекенда с одной долгоживущей сессией и пулом keep-alive соединений."""
+
+    def __init__(
+        self,
+        base_url: str = BACKEND_URL,
+        *,
+        pool_limit: int = BACKEND_POOL_LIMIT,
+        pool_limit_per_host: int = BACKEND_POOL_LIMIT_PER_HOST,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30,
+    ):
+        self.tasks_url = f"{base_url.rstrip('/')}/api/tasks/"
+        self.categories_resolve_url = f"{base_url.rstrip('/')}/api/categories/resolve/"
+        connector = aiohttp.TCPConnector(
+            limit=pool_limit,
+            limit_per_host=pool_limit_per_host,
+            ttl_dns_cache=dns_cache_ttl,
+            keepalive_timeout=keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT)
+        self._category_ids = TTLCache(CATEGORY_CACHE_SIZE, CATEGORY_CACHE_TTL)
+        self._task_pages = TTLCache(TASKS_CACHE_SIZE, TASKS_CACHE_TTL)
+        # Короткоживущий снимок задач пользователя: окна диалога (список, карточка,
+        # редактирование) читают его вместо повторных запросов к API.
+        self._snapshots = TTLCache(TASKS_SNAPSHOT_SIZE, TASKS_SNAPSHOT_TTL)
+        self._inflight = SingleFlight()
+
+    async def close(self) -> None:
+        """Закрывает сессию и соединения пула."""
+        await self._session.close()
+
+    def _snapshot(self, telegram_id: str) -> TaskSnapshot:
+        snapshot = self._snapshots.get(telegram_id)
+        if snapshot is None:
+            snapshot = TaskSnapshot()
+            self._snapshots.set(telegram_id, snapshot)
+        return snapshot
+
+    def _is_current(self, telegram_id: str, snapshot: TaskSnapshot, generation: int) -> bool:
+        """Проверяет, что за время запроса снимок не сменился и задачи не менялись."""
+        return self._snapshots.get(telegram_id) is snapshot and snapshot.generation == generation
+
+    async def get_tasks_page(self, telegram_id: str, cursor: Optional[str] = None) -> dict:
+        """Возвращает одну страницу задач пользователя и курсоры соседних страниц.
+
+        Страница из снимка пользователя отдается без запроса; одновременные
+        запросы одной страницы объединяются в один, но только в пределах одного
+        поколения снимка, чтобы после изменения не получить ответ, начатый до него.
+        """
+        snapshot = self._snapshot(telegram_id)
+        page = snapshot.pages.get(cursor)
+        if page is None:
+            generation = snapshot.generation
+            page = await self._inflight.run(
+                ("page", telegram_id, cursor, id(snapshot), generation),
+                lambda: self._fetch_tasks_page(telegram_id, cursor),
+            )
+            if self._is_current(telegram_id, snapshot, generation):
+                snapshot.put_page(cursor, page)
+        return {
+            "results": page["results"],
+            "next": _extract_cursor(page.get("next")),
+            "previous": _extract_cursor(page.get("previous")),
+        }
+
+    async def _fetch_tasks_page(self, telegram_id: str, cursor: Optional[str]) -> dict:
+        """Запрашивает страницу у API.
+
+        Последний ответ хранится вместе с ETag: повторный запрос отправляется
+        с `If-None-Match`, и при ответе 304 страница берется из памяти.
+        """
+        params = {"telegram_id": telegram_id, "page_size": TASKS_PAGE_SIZE}
+        if cursor:
+            params["cursor"] = cursor
+        cache_key = (telegram_id, cursor)
+        cached = self._task_pages.get(cache_key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+        async with self._session.get(self.tasks_url, params=params, headers=headers) as response:
+            if response.status == 304 and cached:
+                page = cached[1]
+            else:
+                response.raise_for_status()
+                page = await response.json()
+                etag = response.headers.get("ETag")
+                if etag:
+                    self._task_pages.set(cache_key, (etag, page))
+        return {**page, "results": list(page["results"])}
+
+    async def get_task_by_id(self, telegram_id: str, task_id: int) -> Optional[dict]:
+        """Возвращает задачу по ID, если она принадлежит пользователю; сначала ищет в снимке."""
+        snapshot = self._snapshot(telegram_id)
+        task = snapshot.tasks.get(task_id)
+        if task is None:
+            generation = snapshot.generation
+            task = await self._inflight.run(
+                ("task", telegram_id, task_id, id(snapshot), generation),
+                lambda: self._fetch_task(telegram_id, task_id),
+            )
+            if task is not None and self._is_current(telegram_id, snapshot, generation):
+                snapshot.put_task(task)
+        return task
+
+    async def _fetch_task(self, telegram_id: str, task_id: int) -> Optional[dict]:
+        async with self._session.get(
+            f"{self.tasks_url}{task_id}/", params={"telegram_id": telegram_id}
+        ) as response:
+            if response.status == 404:
+                return None
+            response.raise_for_status()
+            return await response.json()
+
+    async def get_or_create_category_id(self, name: str) -> int:
+        """Возвращает ID существующей категории или создает новую."""
+        category_name = name.strip()
+        category_id = self._category_ids.get(category_name.lower())
+        if category_id is not None:
+            return category_id
+        async with self._session.post(
+            self.categories_resolve_url, json={"name": category_name}
+        ) as response:
+            response.raise_for_status()
+            category = await response.json()
+        self._category_ids.set(category_name.lower(), category["id"])
+        return category["id"]
+
+    async def _send_with_category(
+        self, method: str, url: str, payload: dict, category_name: str, **kwargs
+    ) -> aiohttp.ClientResponse:
+        """Отправляет запрос с `category_id`, обновляя кеш, если категория была удалена."""
+        payload["category_id"] = await self.get_or_create_category_id(category_name)
+        response = await self._session.request(method, url, json=payload, **kwargs)
+        if response.status == 400 and "category_id" in await response.json(content_type=None):
+            response.release()
+            self._category_ids.pop(category_name.strip().lower())
+            payload["category_id"] = await self.get_or_create_category_id(category_name)
+            response = await self._session.request(method, url, json=payload, **kwargs)
+        return response
+
+    async def create_task_for_telegram_user(
+        self, telegram_id: str, title: str, category_name: str, due_date: str
+    ) -> None:
+        """Создает задачу в бекенде для пользователя Telegram."""
+        payload = {
+            "title": title,
+            "telegram_id": telegram_id,
+            "due_date": due_date,
+        }
+        async with await self._send_with_category(
+            "POST", self.tasks_url, payload, category_name
+        ) as response:
+            response.raise_for_status()
+            task = await response.json()
+        snapshot = self._snapshot(telegram_id)
+        snapshot.reset_pages()
+        snapshot.put_task(task)
+
+    async def update_task_field(
+        self,
+        telegram_id: str,
+        task_id: int,
+        *,
+        title: Optional[str] = None,
+        category_name: Optional[str] = None,
+        due_date_iso: Optional[str] = None,
+    ) -> None:
+        """Обновляет поля задачи пользователя."""
+        url = f"{self.tasks_url}{task_id}/"
+        params = {"telegram_id": telegram_id}
+        payload: dict = {}
+        if title is not None:
+            payload["title"] = title
+        if due_date_iso is not None:
+            payload["due_date"] = due_date_iso
+        if category_name is not None:
+            request = self._send_with_category("PATCH", url, payload, category_name, params=params)
+        else:
+            request = self._session.patch(url, params=params, json=payload)
+        async with await request as response:
+            if response.status == 404:
+                self._snapshot(telegram_id).reset_pages(removed_task_id=task_id)
+                raise ValueError("Задача не найдена")
+            response.raise_for_status()
+            task = await response.json()
+        self._snapshot(telegram_id).task_changed(task)
+
+    async def delete_task(self, telegram_id: str, task_id: int) -> None:
+        """Удаляет задачу пользователя."""
+        async with self._session.delete(
+            f"{self.tasks_url}{task_id}/", params={"telegram_id": telegram_id}
+        ) as response:
+            if response.status == 404:
+                self._snapshot(telegram_id).reset_pages(removed_task_id=task_id)
+                raise ValueError("Задача не найдена")
+            response.raise_for_status()
+        self._snapshot(telegram_id).reset_pages(removed_task_id=task_id)
+
+
+class BackendMiddleware(BaseMiddleware):
+    """Передает общий BackendClient в данные обработчиков и диалогов."""
+
+    def __init__(self, backend: BackendClient):
+        self.backend = backend
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        data["backend"] = self.backend
+        return await handler(event, data)
+
+
+def get_backend(manager: DialogManager) -> BackendClient:
+    """Возвращает BackendClient, переданный в диалог через middleware."""
+    return manager.middleware_data["backend"]
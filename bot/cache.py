@@ -0,0 +1,64 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+_MISSING = object()
+T = TypeVar("T")
+
+
+class TTLCache:
+    """LRU-кеш в памяти с ограничением размера и временем жизни записей."""
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Возвращает значение, если оно есть и не устарело, и поднимает его в LRU."""
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        expires_at, value = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохраняет значение, вытесняя самые давно использованные записи."""
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Удаляет запись, если она есть."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Очищает кеш."""
+        self._data.clear()
+
+
+class SingleFlight:
+    """Объединяет одновременные вызовы с одним ключом: пока запрос идет, остальные ждут его результат."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Выполняет `func()` или присоединяется к уже идущему вызову с тем же ключом."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Отмена одного ожидающего не должна отменять общий запрос остальных.
+        return await asyncio.shield(task)
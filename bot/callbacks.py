@@ -5,16 +5,8 @@ from aiohttp import ClientError, ClientResponseError
 from aiogram.types import CallbackQuery, Message
 from aiogram_dialog import DialogManager, ShowMode
 
-from getters import (
-    build_due_date_iso,
-    create_task_for_telegram_user,
-    delete_task,
-    get_task_by_id,
-    parse_user_date,
-    parse_user_time,
-    update_task_field,
-    _parse_due_or_now,
-)
+from backend import get_backend
+from getters import build_due_date_iso, _parse_due_or_now
 from states import TodoSG
 
 logger = logging.getLogger(__name__)
@@ -22,9 +14,20 @@ logger = logging.getLogger(__name__)
 
 async def go_tasks_list(c: CallbackQuery, button, manager: DialogManager):
     """Переход к списку задач."""
+    manager.dialog_data.pop("tasks_cursor", None)
     await manager.switch_to(TodoSG.tasks_list)
 
 
+async def go_tasks_next_page(c: CallbackQuery, button, manager: DialogManager):
+    """Переход на следующую страницу списка задач."""
+    manager.dialog_data["tasks_cursor"] = manager.dialog_data.get("tasks_next_cursor")
+
+
+async def go_tasks_prev_page(c: CallbackQuery, button, manager: DialogManager):
+    """Переход на предыдущую страницу списка задач."""
+    manager.dialog_data["tasks_cursor"] = manager.dialog_data.get("tasks_prev_cursor")
+
+
 async def go_add_task(c: CallbackQuery, button, manager: DialogManager):
     """Начать добавление задачи."""
     manager.dialog_data.pop("add_title", None)
@@ -71,7 +74,7 @@ async def do_delete(c: CallbackQuery, button, manager: DialogManager):
     task_id = manager.dialog_data.get("task_id")
 
     try:
-        await delete_task(telegram_id, int(task_id))
+        await get_backend(manager).delete_task(telegram_id, int(task_id))
         manager.dialog_data["flash"] = "✅ Задача удалена"
         logger.info("task_deleted | telegram_id=%s task_id=%s", telegram_id, task_id)
     except (ValueError, ClientError, ClientResponseError) as e:
@@ -148,7 +151,7 @@ async def add_time_success(m: Message, widget, manager: DialogManager, data):
     time_value = m.text.strip()
     try:
         due_date_iso = build_due_date_iso(date_value, time_value)
-        await create_task_for_telegram_user(telegram_id, title, category, due_date_iso)
+        await get_backend(manager).create_task_for_telegram_user(telegram_id, title, category, due_date_iso)
         manager.dialog_data["flash"] = "✅ Задача успешно создана"
         logger.info("task_created | telegram_id=%s title=%s due=%s", telegram_id, title, due_date_iso)
     except (ClientError, ClientResponseError) as e:
@@ -164,7 +167,7 @@ async def on_edit_title_input(m: Message, widget, manager: DialogManager):
     task_id = manager.dialog_data["task_id"]
 
     try:
-        await update_task_field(telegram_id, task_id, title=m.text.strip())
+        await get_backend(manager).update_task_field(telegram_id, task_id, title=m.text.strip())
         manager.dialog_data["flash"] = "✅ Название обновлено"
         logger.info("task_updated | telegram_id=%s task_id=%s field=title", telegram_id, task_id)
     except (ClientError, ClientResponseError, ValueError) as e:
@@ -181,7 +184,7 @@ async def on_edit_category_input(m: Message, widget, manager: DialogManager):
     task_id = manager.dialog_data["task_id"]
 
     try:
-        await update_task_field(telegram_id, task_id, category_name=m.text.strip())
+        await get_backend(manager).update_task_field(telegram_id, task_id, category_name=m.text.strip())
         manager.dialog_data["flash"] = "✅ Категория обновлена"
         logger.info("task_updated | telegram_id=%s task_id=%s field=category", telegram_id, task_id)
     except (ClientError, ClientResponseError, ValueError) as e:
@@ -204,14 +207,14 @@ async def edit_date_success(m: Message, widget, manager: DialogManager, data):
     task_id = manager.dialog_data["task_id"]
     new_date = data
     try:
-        task = await get_task_by_id(telegram_id, task_id)
+        task = await get_backend(manager).get_task_by_id(telegram_id, task_id)
         if not task:
             manager.dialog_data["flash"] = "❌ Задача не найдена"
             await manager.switch_to(TodoSG.tasks_list)
             return
         base_dt = _parse_due_or_now(task.get("due_date"))
         due_date_iso = datetime.combine(new_date, base_dt.time()).isoformat()
-        await update_task_field(telegram_id, task_id, due_date_iso=due_date_iso)
+        await get_backend(manager).update_task_field(telegram_id, task_id, due_date_iso=due_date_iso)
         manager.dialog_data["flash"] = "✅ Дата обновлена"
         logger.info("task_updated | telegram_id=%s task_id=%s field=due_date", telegram_id, task_id)
     except (ClientError, ClientResponseError, ValueError) as e:
@@ -233,14 +236,14 @@ async def edit_time_success(m: Message, widget, manager: DialogManager, data):
     task_id = manager.dialog_data["task_id"]
     new_time = data
     try:
-        task = await get_task_by_id(telegram_id, task_id)
+        task = await get_backend(manager).get_task_by_id(telegram_id, task_id)
         if not task:
             manager.dialog_data["flash"] = "❌ Задача не найдена"
             await manager.switch_to(TodoSG.tasks_list)
             return
         base_dt = _parse_due_or_now(task.get("due_date"))
         due_date_iso = datetime.combine(base_dt.date(), new_time).isoformat()
-        await update_task_field(telegram_id, task_id, due_date_iso=due_date_iso)
+        await get_backend(manager).update_task_field(telegram_id, task_id, due_date_iso=due_date_iso)
         manager.dialog_data["flash"] = "✅ Время обновлено"
         logger.info("task_updated | telegram_id=%s task_id=%s field=due_time", telegram_id, task_id)
     except (ClientError, ClientResponseError, ValueError) as e:
@@ -1,6 +1,6 @@
 from aiogram_dialog import Dialog, Window
 from aiogram_dialog.widgets.input import MessageInput, TextInput
-from aiogram_dialog.widgets.kbd import Button, ScrollingGroup, Select
+from aiogram_dialog.widgets.kbd import Button, Column, Row, Select
 from aiogram_dialog.widgets.text import Const, Format
 
 from callbacks import (
@@ -21,6 +21,8 @@ from callbacks import (
     go_add_task,
     go_edit_menu,
     go_tasks_list,
+    go_tasks_next_page,
+    go_tasks_prev_page,
     on_add_category_input,
     on_add_title_input,
     on_edit_category_input,
@@ -54,10 +56,10 @@ todo_dialog = Dialog(
     Window(
         Format(
             "📝 Ваши задачи\n"
-            "Всего: {count}\n\n"
+            "На странице: {count}\n\n"
             "{flash}"
         ),
-        ScrollingGroup(
+        Column(
             Select(
                 Format("{item[text]}"),
                 id="task_select",
@@ -65,9 +67,10 @@ todo_dialog = Dialog(
                 items="tasks",
                 on_click=on_task_click,
             ),
-            id="task_scroll",
-            width=1,
-            height=10,
+        ),
+        Row(
+            Button(Const("◀"), id="tasks_prev", on_click=go_tasks_prev_page, when="has_prev"),
+            Button(Const("▶"), id="tasks_next", on_click=go_tasks_next_page, when="has_next"),
         ),
         Button(Const("⬅ Назад"), id="back_menu", on_click=back_to_menu),
         state=TodoSG.tasks_list,
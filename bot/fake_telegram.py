@@ -0,0 +1,149 @@
+"""Поддельный сервер Telegram Bot API для локальной проверки бота без Telegram.
+
+Запуск:
+    python fake_telegram.py --port 8081
+    TELEGRAM_API_URL=http://127.0.0.1:8081 TELEGRAM_BOT_TOKEN=1:fake python main.py
+
+Управление:
+    POST /fake/updates?repeat=N — доставить апдейт (или список) на вебхук, а без
+        вебхука — поставить в очередь getUpdates; `repeat` повторяет доставку.
+    GET /fake/calls — вызовы Bot API, полученные от бота; DELETE очищает журнал.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Optional
+
+from aiohttp import ClientSession, web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_todo_bot"}
+
+
+class FakeTelegram:
+    """Состояние поддельного Bot API: журнал вызовов, вебхук и очередь апдейтов."""
+
+    def __init__(self):
+        self.calls: list[dict[str, Any]] = []
+        self.webhook: Optional[dict[str, Any]] = None
+        self._updates: list[dict[str, Any]] = []
+        self._updates_changed = asyncio.Event()
+        self._message_id = 0
+        self._session: Optional[ClientSession] = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.api)
+        app.router.add_post("/fake/updates", self.push_updates)
+        app.router.add_get("/fake/calls", self.get_calls)
+        app.router.add_delete("/fake/calls", self.clear_calls)
+        app.on_cleanup.append(self._close_session)
+        return app
+
+    async def _close_session(self, app: web.Application) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    async def api(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = {key: _decode(value) for key, value in (await request.post()).items()}
+        self.calls.append({"method": method, "params": params})
+        handler = getattr(self, f"_{method}", None)
+        result = await handler(params) if handler else True
+        return web.json_response({"ok": True, "result": result})
+
+    async def _getMe(self, params: dict) -> dict:
+        return BOT_USER
+
+    async def _setWebhook(self, params: dict) -> bool:
+        self.webhook = params
+        return True
+
+    async def _deleteWebhook(self, params: dict) -> bool:
+        self.webhook = None
+        return True
+
+    async def _getWebhookInfo(self, params: dict) -> dict:
+        url = self.webhook["url"] if self.webhook else ""
+        return {"url": url, "has_custom_certificate": False, "pending_update_count": 0}
+
+    async def _getUpdates(self, params: dict) -> list:
+        offset = int(params.get("offset") or 0)
+        self._updates = [update for update in self._updates if update["update_id"] >= offset]
+        if not self._updates:
+            self._updates_changed.clear()
+            try:
+                await asyncio.wait_for(
+                    self._updates_changed.wait(), timeout=float(params.get("timeout") or 0)
+                )
+            except asyncio.TimeoutError:
+                pass
+        return self._updates
+
+    async def _sendMessage(self, params: dict) -> dict:
+        return self._message(params)
+
+    async def _editMessageText(self, params: dict) -> dict:
+        return self._message(params, message_id=int(params["message_id"]))
+
+    def _message(self, params: dict, message_id: Optional[int] = None) -> dict:
+        if message_id is None:
+            self._message_id += 1
+            message_id = self._message_id
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": int(params["chat_id"]), "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text", ""),
+        }
+
+    async def push_updates(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        updates = payload if isinstance(payload, list) else [payload]
+        repeat = int(request.query.get("repeat", "1"))
+        if self.webhook is None:
+            self._updates.extend(updates)
+            self._updates_changed.set()
+            return web.json_response({"queued": len(updates)})
+        statuses = []
+        for update in updates:
+            for _ in range(repeat):
+                statuses.append(await self._deliver(update))
+        return web.json_response({"delivered": statuses})
+
+    async def _deliver(self, update: dict) -> int:
+        if self._session is None:
+            self._session = ClientSession()
+        headers = {}
+        if self.webhook.get("secret_token"):
+            headers["X-Telegram-Bot-Api-Secret-Token"] = self.webhook["secret_token"]
+        async with self._session.post(self.webhook["url"], json=update, headers=headers) as response:
+            await response.read()
+            return response.status
+
+    async def get_calls(self, request: web.Request) -> web.Response:
+        return web.json_response(self.calls)
+
+    async def clear_calls(self, request: web.Request) -> web.Response:
+        self.calls.clear()
+        return web.json_response({})
+
+
+def _decode(value: Any) -> Any:
+    """Поля Bot API приходят формой; вложенные объекты aiogram сериализует в JSON."""
+    if isinstance(value, str) and value[:1] in "[{":
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+    web.run_app(FakeTelegram().app(), host=args.host, port=args.port)
@@ -1,12 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-import aiohttp
 from aiogram_dialog import DialogManager
 
-TASKS_API_URL = "http://backend:8000/api/tasks/"
-CATEGORIES_API_URL = "http://backend:8000/api/categories/"
-HTTP_TIMEOUT = aiohttp.ClientTimeout(total=12)
+from backend import get_backend
 
 
 def parse_user_date(value: str) -> datetime.date:
@@ -26,88 +23,6 @@ def build_due_date_iso(date_value: str, time_value: str) -> str:
     return datetime.combine(parsed_date, parsed_time).isoformat()
 
 
-async def get_tasks_for_telegram_user(telegram_id: str) -> list[dict]:
-    """Возвращает список задач для указанного Telegram ID."""
-    async with aiohttp.ClientSession(timeout=HTTP_TIMEOUT) as session:
-        async with session.get(TASKS_API_URL, params={"telegram_id": telegram_id}) as response:
-            response.raise_for_status()
-            return await response.json()
-
-
-async def get_task_by_id(telegram_id: str, task_id: int) -> Optional[dict]:
-    """Возвращает задачу по ID, если она принадлежит пользователю."""
-    tasks = await get_tasks_for_telegram_user(telegram_id)
-    for task in tasks:
-        if int(task["id"]) == int(task_id):
-            return task
-    return None
-
-
-async def get_or_create_category_id(session: aiohttp.ClientSession, name: str) -> int:
-    """Возвращает ID существующей категории или создает новую."""
-    category_name = name.strip()
-    async with session.get(CATEGORIES_API_URL) as response:
-        response.raise_for_status()
-        categories = await response.json()
-    for category in categories:
-        if category["name"].lower() == category_name.lower():
-            return category["id"]
-    async with session.post(CATEGORIES_API_URL, json={"name": category_name}) as response:
-        response.raise_for_status()
-        created = await response.json()
-    return created["id"]
-
-
-async def create_task_for_telegram_user(
-    telegram_id: str, title: str, category_name: str, due_date: str
-) -> None:
-    """Создает задачу в бекенде для пользователя Telegram."""
-    async with aiohttp.ClientSession(timeout=HTTP_TIMEOUT) as session:
-        category_id = await get_or_create_category_id(session, category_name)
-        payload = {
-            "title": title,
-            "category_id": category_id,
-            "telegram_id": telegram_id,
-            "due_date": due_date,
-        }
-        async with session.post(TASKS_API_URL, json=payload) as response:
-            response.raise_for_status()
-
-
-async def update_task_field(
-    telegram_id: str,
-    task_id: int,
-    *,
-    title: Optional[str] = None,
-    category_name: Optional[str] = None,
-    due_date_iso: Optional[str] = None,
-) -> None:
-    """Обновляет поля задачи пользователя."""
-    task = await get_task_by_id(telegram_id, task_id)
-    if task is None:
-        raise ValueError("Задача не найдена")
-    async with aiohttp.ClientSession(timeout=HTTP_TIMEOUT) as session:
-        payload: dict = {}
-        if title is not None:
-            payload["title"] = title
-        if category_name is not None:
-            payload["category_id"] = await get_or_create_category_id(session, category_name)
-        if due_date_iso is not None:
-            payload["due_date"] = due_date_iso
-        async with session.patch(f"{TASKS_API_URL}{task_id}/", json=payload) as response:
-            response.raise_for_status()
-
-
-async def delete_task(telegram_id: str, task_id: int) -> None:
-    """Удаляет задачу пользователя."""
-    task = await get_task_by_id(telegram_id, task_id)
-    if task is None:
-        raise ValueError("Задача не найдена")
-    async with aiohttp.ClientSession(timeout=HTTP_TIMEOUT) as session:
-        async with session.delete(f"{TASKS_API_URL}{task_id}/") as response:
-            response.raise_for_status()
-
-
 def format_task_card(task: dict) -> str:
     """Формирует карточку задачи для детального просмотра."""
     created = _format_dt(task.get("created_at"))
@@ -147,17 +62,23 @@ async def menu_getter(dialog_manager: DialogManager, **kwargs):
 async def tasks_list_getter(dialog_manager: DialogManager, **kwargs):
     """Getter для списка задач."""
     telegram_id = str(dialog_manager.event.from_user.id)
+    cursor = dialog_manager.dialog_data.get("tasks_cursor")
     try:
-        tasks = await get_tasks_for_telegram_user(telegram_id)
+        page = await get_backend(dialog_manager).get_tasks_page(telegram_id, cursor)
     except Exception:
         return {
             "tasks": [],
             "count": 0,
+            "has_next": False,
+            "has_prev": False,
             "flash": "❌ Не удалось получить задачи\n\n",
         }
 
+    dialog_manager.dialog_data["tasks_next_cursor"] = page["next"]
+    dialog_manager.dialog_data["tasks_prev_cursor"] = page["previous"]
+
     items = []
-    for task in tasks:
+    for task in page["results"]:
         title = (task.get("title") or "Без названия")[:35]
         items.append({"id": task["id"], "text": title})
 
@@ -168,6 +89,8 @@ async def tasks_list_getter(dialog_manager: DialogManager, **kwargs):
     return {
         "tasks": items,
         "count": len(items),
+        "has_next": page["next"] is not None,
+        "has_prev": page["previous"] is not None,
         "flash": flash,
     }
 
@@ -185,7 +108,7 @@ async def task_view_getter(dialog_manager: DialogManager, **kwargs):
         return {"found": False, "flash": flash}
 
     try:
-        task = await get_task_by_id(telegram_id, int(task_id))
+        task = await get_backend(dialog_manager).get_task_by_id(telegram_id, int(task_id))
     except Exception:
         return {"found": False, "flash": flash}
 
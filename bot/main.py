@@ -3,12 +3,30 @@ import logging
 import os
 
 from aiogram import Bot, Dispatcher, Router
-from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.filters import Command, ExceptionTypeFilter
+from aiogram.fsm.storage.base import DefaultKeyBuilder
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisEventIsolation
+from aiogram.types import CallbackQuery, ErrorEvent, Message
 from aiogram_dialog import DialogManager, StartMode, setup_dialogs
+from aiogram_dialog.api.exceptions import UnknownIntent
+from redis.asyncio import Redis
 
+from backend import BackendClient, BackendMiddleware
 from dialogs import todo_dialog
 from states import TodoSG
+from storage import RedisHashStorage
+from webhook import UpdateDeduplicator, run_webhook
+
+# polling (по умолчанию) или webhook.
+BOT_MODE = os.environ.get("BOT_MODE", "polling")
+REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/0")
+# redis (по умолчанию): диалоги переживают перезапуск и общие для реплик; memory — в процессе.
+BOT_FSM_STORAGE = os.environ.get("BOT_FSM_STORAGE", "redis")
+# Локальный сервер Bot API, например fake_telegram.py; по умолчанию api.telegram.org.
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL")
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)s %(name)s: %(message)s",
@@ -34,15 +52,57 @@ async def on_notification_ok(callback: CallbackQuery):
     await callback.answer()
 
 
+def create_bot() -> Bot:
+    """Создает бота; `TELEGRAM_API_URL` перенаправляет запросы Bot API на другой сервер."""
+    session = None
+    if TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+    return Bot(os.environ["TELEGRAM_BOT_TOKEN"], session=session)
+
+
+async def on_unknown_intent(event: ErrorEvent, dialog_manager: DialogManager) -> None:
+    """Диалог кнопки истек по TTL или потерян: открывает главное меню заново."""
+    logger.info("Устаревший диалог: %s", event.exception)
+    if event.update.callback_query:
+        await event.update.callback_query.answer()
+    await dialog_manager.start(TodoSG.menu, mode=StartMode.RESET_STACK)
+
+
 async def main() -> None:
-    """Запускает режим длинного опроса бота."""
-    logger.info("Бот запускается")
-    bot = Bot(os.environ["TELEGRAM_BOT_TOKEN"])
-    dp = Dispatcher()
+    """Запускает бота в режиме длинного опроса или вебхука (`BOT_MODE`)."""
+    logger.info("Бот запускается, режим %s", BOT_MODE)
+    bot = create_bot()
+    backend = BackendClient()
+    use_redis = BOT_FSM_STORAGE == "redis" or BOT_MODE == "webhook"
+    redis = Redis.from_url(REDIS_URL) if use_redis else None
+    storage = RedisHashStorage(redis) if BOT_FSM_STORAGE == "redis" else MemoryStorage()
+    dp = Dispatcher(storage=storage)
+    events_isolation = None
+    if BOT_MODE == "webhook":
+        dp.update.outer_middleware(UpdateDeduplicator(redis))
+        # Апдейты одного пользователя могут прийти на разные реплики: стек диалога
+        # блокируется в Redis, а не в памяти процесса.
+        events_isolation = RedisEventIsolation(
+            redis, key_builder=DefaultKeyBuilder(prefix="todo:bot:lock", with_destiny=True)
+        )
+    dp.update.outer_middleware(BackendMiddleware(backend))
+    dp.errors.register(on_unknown_intent, ExceptionTypeFilter(UnknownIntent))
     dp.include_router(router)
     dp.include_router(todo_dialog)
-    setup_dialogs(dp)
-    await dp.start_polling(bot)
+    setup_dialogs(dp, events_isolation=events_isolation)
+    try:
+        if BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            # После работы в режиме вебхука getUpdates недоступен, пока вебхук не снят.
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        await backend.close()
+        await bot.session.close()
+        await storage.close()
+        if redis is not None:
+            await redis.aclose()
     logger.info("Бот остановлен")
 
 
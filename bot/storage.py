@@ -0,0 +1,67 @@
+import json
+import os
+from typing import Any, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from redis.asyncio import Redis
+
+FSM_TTL = int(os.environ.get("BOT_FSM_TTL", str(7 * 24 * 3600)))
+FSM_PREFIX = "todo:bot:fsm"
+
+
+def _dumps(data: Mapping[str, Any]) -> bytes:
+    # Без пробелов и \uXXXX-экранирования: кириллица в dialog_data занимает 2 байта, а не 6.
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class RedisHashStorage(BaseStorage):
+    """FSM-хранилище aiogram в Redis: все записи чата — поля одного хеша.
+
+    Стек и контексты aiogram-dialog одного пользователя лежат в одном ключе,
+    каждая запись обновляет его TTL одним конвейером (HSET + EXPIRE). Брошенный
+    диалог целиком истекает через `BOT_FSM_TTL`, так что память растет с числом
+    активных, а не всех пользователей.
+    """
+
+    def __init__(self, redis: Redis, ttl: int = FSM_TTL, prefix: str = FSM_PREFIX):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, key: StorageKey) -> str:
+        parts = [self.prefix, str(key.bot_id), str(key.chat_id), str(key.user_id)]
+        if key.thread_id:
+            parts.append(f"t{key.thread_id}")
+        if key.business_connection_id:
+            parts.append(f"b{key.business_connection_id}")
+        return ":".join(parts)
+
+    async def _write(self, key: StorageKey, field: str, value: Optional[bytes]) -> None:
+        redis_key = self._key(key)
+        if value is None:
+            await self.redis.hdel(redis_key, field)
+            return
+        async with self.redis.pipeline(transaction=False) as pipeline:
+            pipeline.hset(redis_key, field, value)
+            pipeline.expire(redis_key, self.ttl)
+            await pipeline.execute()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        if isinstance(state, State):
+            state = state.state
+        await self._write(key, f"{key.destiny}:state", state.encode() if state else None)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        value = await self.redis.hget(self._key(key), f"{key.destiny}:state")
+        return value.decode() if value is not None else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._write(key, f"{key.destiny}:data", _dumps(data) if data else None)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        value = await self.redis.hget(self._key(key), f"{key.destiny}:data")
+        return json.loads(value) if value is not None else {}
+
+    async def close(self) -> None:
+        pass
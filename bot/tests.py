@@ -0,0 +1,372 @@
+import asyncio
+import itertools
+import os
+import unittest
+from types import SimpleNamespace
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+from redis.asyncio import Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+from redis.exceptions import RedisError
+
+from backend import BackendClient, BackendMiddleware, get_backend
+from cache import SingleFlight
+from fake_telegram import FakeTelegram
+from webhook import UPDATE_DEDUP_PREFIX, WEBHOOK_PATH, UpdateDeduplicator, build_webhook_app
+
+REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/0")
+_update_ids = itertools.count(int.from_bytes(os.urandom(4), "big"))
+
+
+def _message_update(update_id: int, text: str = "hi") -> dict:
+    user = {"id": 42, "is_bot": False, "first_name": "User"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": 1,
+            "date": 0,
+            "chat": {"id": 42, "type": "private"},
+            "from": user,
+            "text": text,
+        },
+    }
+
+
+class WebhookReplica:
+    """Реплика бота в режиме вебхука: диспетчер с дедупликацией и сервер aiohttp."""
+
+    def __init__(self, telegram: TestServer, redis: Redis | None):
+        self.handled: list[int] = []
+        router = Router()
+
+        @router.message()
+        async def echo(message: Message) -> None:
+            self.handled.append(message.message_id)
+            await message.answer("pong")
+
+        self.dp = Dispatcher()
+        self.dp.update.outer_middleware(UpdateDeduplicator(redis))
+        self.dp.include_router(router)
+        session = AiohttpSession(api=TelegramAPIServer.from_base(str(telegram.make_url(""))))
+        self.bot = Bot("1:fake", session=session)
+        self.server = TestServer(build_webhook_app(self.dp, self.bot))
+
+    @property
+    def url(self) -> str:
+        return str(self.server.make_url(WEBHOOK_PATH))
+
+    async def start(self) -> None:
+        await self.server.start_server()
+
+    async def close(self) -> None:
+        await self.server.close()
+        await self.bot.session.close()
+
+
+class WebhookDeduplicationTests(unittest.IsolatedAsyncioTestCase):
+    """Тесты вебхука против fake_telegram: повторная доставка апдейта обрабатывается один раз."""
+
+    async def asyncSetUp(self):
+        self.fake = FakeTelegram()
+        self.telegram = TestServer(self.fake.app())
+        await self.telegram.start_server()
+        self.addAsyncCleanup(self.telegram.close)
+
+    async def _replica(self, redis: Redis | None) -> WebhookReplica:
+        replica = WebhookReplica(self.telegram, redis)
+        await replica.start()
+        self.addAsyncCleanup(replica.close)
+        return replica
+
+    async def _push(self, update: dict, repeat: int = 1) -> list[int]:
+        """Просит фейковый Telegram доставить апдейт на вебхук `repeat` раз."""
+        async with ClientSession() as client:
+            url = self.telegram.make_url(f"/fake/updates?repeat={repeat}")
+            async with client.post(url, json=update) as response:
+                return (await response.json())["delivered"]
+
+    async def _sent_messages(self, expected: int) -> list[dict]:
+        # Вебхук отвечает сразу, а апдейт обрабатывается в фоне.
+        for _ in range(100):
+            sent = [call for call in self.fake.calls if call["method"] == "sendMessage"]
+            if len(sent) >= expected:
+                break
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.1)
+        return [call for call in self.fake.calls if call["method"] == "sendMessage"]
+
+    async def test_repeated_update_is_handled_once(self):
+        replica = await self._replica(redis=None)
+        await replica.bot.set_webhook(replica.url)
+        self.assertEqual(self.fake.webhook["url"], replica.url)
+
+        statuses = await self._push(_message_update(next(_update_ids)), repeat=3)
+        self.assertEqual(statuses, [200, 200, 200])
+        sent = await self._sent_messages(1)
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(sent[0]["params"]["text"], "pong")
+        self.assertEqual(len(replica.handled), 1)
+
+        await self._push(_message_update(next(_update_ids)))
+        self.assertEqual(len(await self._sent_messages(2)), 2)
+
+    async def test_redis_failure_falls_back_to_memory(self):
+        unreachable = Redis(port=1, socket_connect_timeout=0.1, retry=Retry(NoBackoff(), 0))
+        self.addAsyncCleanup(unreachable.aclose)
+        replica = await self._replica(redis=unreachable)
+        await replica.bot.set_webhook(replica.url)
+
+        with self.assertLogs("webhook", "WARNING"):
+            await self._push(_message_update(next(_update_ids)), repeat=2)
+            sent = await self._sent_messages(1)
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(len(replica.handled), 1)
+
+    async def test_repeat_on_another_replica_is_skipped(self):
+        redis = Redis.from_url(REDIS_URL, socket_connect_timeout=1)
+        self.addAsyncCleanup(redis.aclose)
+        try:
+            await redis.ping()
+        except RedisError:
+            self.skipTest("Redis недоступен")
+        first, second = await self._replica(redis), await self._replica(redis)
+        update = _message_update(next(_update_ids))
+        key = f"{UPDATE_DEDUP_PREFIX}:1:{update['update_id']}"
+
+        async def forget_update() -> None:
+            await redis.delete(key)
+
+        self.addAsyncCleanup(forget_update)
+
+        await first.bot.set_webhook(first.url)
+        await self._push(update)
+        await self._sent_messages(1)
+        # Telegram повторил апдейт, и балансировщик отправил его на другую реплику.
+        await second.bot.set_webhook(second.url)
+        await self._push(update)
+        sent = await self._sent_messages(2)
+        self.assertEqual(len(sent), 1)
+        self.assertEqual((len(first.handled), len(second.handled)), (1, 0))
+
+
+class FakeBackend:
+    """API задач бекенда в памяти; чтения списка можно задержать до `release()`."""
+
+    def __init__(self, tasks: list[dict]):
+        self.tasks = {task["id"]: dict(task) for task in tasks}
+        self.requests: list[tuple[str, str]] = []
+        self.peers: set[tuple] = set()
+        self.list_requested = asyncio.Event()
+        self._list_gate = asyncio.Event()
+        self._list_gate.set()
+
+    def hold_lists(self) -> None:
+        self._list_gate.clear()
+
+    def release(self) -> None:
+        self._list_gate.set()
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._record])
+        app.router.add_get("/api/tasks/", self._list)
+        app.router.add_get("/api/tasks/{id}/", self._retrieve)
+        app.router.add_patch("/api/tasks/{id}/", self._update)
+        app.router.add_delete("/api/tasks/{id}/", self._delete)
+        return app
+
+    @web.middleware
+    async def _record(self, request: web.Request, handler):
+        self.requests.append((request.method, request.path))
+        self.peers.add(request.transport.get_extra_info("peername"))
+        return await handler(request)
+
+    async def _list(self, request: web.Request) -> web.Response:
+        self.list_requested.set()
+        # Список читается до ожидания: так отвечает запрос, начатый до изменения.
+        results = [dict(task) for task in self.tasks.values()]
+        await self._list_gate.wait()
+        return web.json_response({"results": results, "next": None, "previous": None})
+
+    def _task(self, request: web.Request) -> dict:
+        task = self.tasks.get(int(request.match_info["id"]))
+        if task is None:
+            raise web.HTTPNotFound()
+        return task
+
+    async def _retrieve(self, request: web.Request) -> web.Response:
+        return web.json_response(self._task(request))
+
+    async def _update(self, request: web.Request) -> web.Response:
+        task = self._task(request)
+        task.update(await request.json())
+        return web.json_response(task)
+
+    async def _delete(self, request: web.Request) -> web.Response:
+        self._task(request)
+        del self.tasks[int(request.match_info["id"])]
+        return web.Response(status=204)
+
+
+class SingleFlightTests(unittest.IsolatedAsyncioTestCase):
+    """Тесты объединения одновременных вызовов."""
+
+    async def test_concurrent_callers_share_one_call(self):
+        calls = 0
+        gate = asyncio.Event()
+
+        async def fetch() -> str:
+            nonlocal calls
+            calls += 1
+            await gate.wait()
+            return "page"
+
+        flight = SingleFlight()
+        waiters = [asyncio.ensure_future(flight.run("key", fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        self.assertEqual(await asyncio.gather(*waiters), ["page"] * 5)
+        self.assertEqual(calls, 1)
+
+        # После завершения ключ освобождается, и следующий вызов идет заново.
+        self.assertEqual(await flight.run("key", fetch), "page")
+        self.assertEqual(calls, 2)
+
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        gate = asyncio.Event()
+
+        async def fetch() -> str:
+            await gate.wait()
+            return "page"
+
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.run("key", fetch))
+        second = asyncio.ensure_future(flight.run("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+        self.assertEqual(await second, "page")
+
+
+class BackendCacheTests(unittest.IsolatedAsyncioTestCase):
+    """Тесты снимка задач BackendClient: объединение запросов и запись через кеш."""
+
+    TELEGRAM_ID = "42"
+
+    async def asyncSetUp(self):
+        self.api = FakeBackend(
+            [{"id": 1, "title": "Купить хлеб"}, {"id": 2, "title": "Позвонить маме"}]
+        )
+        server = TestServer(self.api.app())
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        self.backend = BackendClient(str(server.make_url("")))
+        self.addAsyncCleanup(self.backend.close)
+
+    def _requests(self, method: str) -> list[str]:
+        return [path for request_method, path in self.api.requests if request_method == method]
+
+    async def test_concurrent_getters_share_one_fetch(self):
+        self.api.hold_lists()
+        getters = [
+            asyncio.ensure_future(self.backend.get_tasks_page(self.TELEGRAM_ID)) for _ in range(5)
+        ]
+        await self.api.list_requested.wait()
+        self.api.release()
+        pages = await asyncio.gather(*getters)
+
+        self.assertEqual(len(self._requests("GET")), 1)
+        self.assertTrue(all(page == pages[0] for page in pages))
+        # Повторные окна диалога читают страницу и задачи из снимка.
+        await self.backend.get_tasks_page(self.TELEGRAM_ID)
+        self.assertEqual((await self.backend.get_task_by_id(self.TELEGRAM_ID, 2))["id"], 2)
+        self.assertEqual(len(self._requests("GET")), 1)
+
+    async def test_update_writes_through_snapshot(self):
+        await self.backend.get_tasks_page(self.TELEGRAM_ID)
+        await self.backend.update_task_field(self.TELEGRAM_ID, 1, title="Купить молоко")
+
+        page = await self.backend.get_tasks_page(self.TELEGRAM_ID)
+        task = await self.backend.get_task_by_id(self.TELEGRAM_ID, 1)
+        self.assertEqual(page["results"][0]["title"], "Купить молоко")
+        self.assertEqual(task["title"], "Купить молоко")
+        self.assertEqual(len(self._requests("GET")), 1)
+
+    async def test_delete_resets_pages(self):
+        await self.backend.get_tasks_page(self.TELEGRAM_ID)
+        await self.backend.delete_task(self.TELEGRAM_ID, 1)
+
+        page = await self.backend.get_tasks_page(self.TELEGRAM_ID)
+        self.assertEqual([task["id"] for task in page["results"]], [2])
+        self.assertEqual(len(self._requests("GET")), 2)
+        self.assertIsNone(await self.backend.get_task_by_id(self.TELEGRAM_ID, 1))
+        self.assertEqual(self._requests("GET")[-1], "/api/tasks/1/")
+
+    async def test_update_of_missing_task_resets_pages(self):
+        await self.backend.get_tasks_page(self.TELEGRAM_ID)
+        del self.api.tasks[1]
+
+        with self.assertRaises(ValueError):
+            await self.backend.update_task_field(self.TELEGRAM_ID, 1, title="Купить молоко")
+        page = await self.backend.get_tasks_page(self.TELEGRAM_ID)
+        self.assertEqual([task["id"] for task in page["results"]], [2])
+
+    async def test_fetch_raced_by_write_is_discarded(self):
+        self.api.hold_lists()
+        getter = asyncio.ensure_future(self.backend.get_tasks_page(self.TELEGRAM_ID))
+        await self.api.list_requested.wait()
+        await self.backend.update_task_field(self.TELEGRAM_ID, 1, title="Купить молоко")
+        self.api.release()
+
+        # Ответ, начатый до изменения, отдается вызвавшему, но в снимок не попадает.
+        stale = await getter
+        self.assertEqual(stale["results"][0]["title"], "Купить хлеб")
+        page = await self.backend.get_tasks_page(self.TELEGRAM_ID)
+        self.assertEqual(page["results"][0]["title"], "Купить молоко")
+        self.assertEqual(len(self._requests("GET")), 2)
+
+
+class BackendClientLifecycleTests(unittest.IsolatedAsyncioTestCase):
+    """Тесты общей сессии BackendClient и ее передачи обработчикам."""
+
+    async def asyncSetUp(self):
+        self.api = FakeBackend([{"id": 1, "title": "Купить хлеб"}])
+        server = TestServer(self.api.app())
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        self.backend = BackendClient(str(server.make_url("")))
+        self.addAsyncCleanup(self.backend.close)
+
+    async def test_requests_reuse_pooled_connection_until_close(self):
+        connector = self.backend._session.connector
+        await self.backend.get_tasks_page("42")
+        await self.backend.get_task_by_id("43", 1)
+        await self.backend.get_task_by_id("44", 1)
+        self.assertEqual(len(self.api.requests), 3)
+        self.assertEqual(len(self.api.peers), 1)
+
+        await self.backend.close()
+        self.assertTrue(self.backend._session.closed)
+        self.assertTrue(connector.closed)
+        with self.assertRaises(RuntimeError):
+            await self.backend.get_task_by_id("45", 1)
+
+    async def test_middleware_shares_one_client(self):
+        middleware = BackendMiddleware(self.backend)
+        seen = []
+
+        async def handler(event, data):
+            seen.append(get_backend(SimpleNamespace(middleware_data=data)))
+
+        await middleware(handler, SimpleNamespace(), {})
+        await middleware(handler, SimpleNamespace(), {})
+        self.assertEqual(seen, [self.backend, self.backend])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+import signal
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject, Update
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from cache import TTLCache
+
+WEBHOOK_URL = os.environ.get("BOT_WEBHOOK_URL", "")
+WEBHOOK_PATH = os.environ.get("BOT_WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_HOST = os.environ.get("BOT_WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.environ.get("BOT_WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET") or None
+WEBHOOK_MAX_CONNECTIONS = int(os.environ.get("BOT_WEBHOOK_MAX_CONNECTIONS", "40"))
+UPDATE_DEDUP_TTL = int(os.environ.get("BOT_UPDATE_DEDUP_TTL", "600"))
+UPDATE_DEDUP_CACHE_SIZE = int(os.environ.get("BOT_UPDATE_DEDUP_CACHE_SIZE", "10000"))
+UPDATE_DEDUP_PREFIX = "todo:bot:update"
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduplicator(BaseMiddleware):
+    """Пропускает повторные доставки апдейта с тем же `update_id`.
+
+    Telegram повторяет запрос, если вебхук не ответил вовремя, и повтор может
+    попасть на другую реплику: отметка ставится в Redis (`SET NX`), без Redis —
+    в памяти процесса. Ошибка Redis не блокирует обработку.
+    """
+
+    def __init__(self, redis: Optional[Redis] = None, ttl: int = UPDATE_DEDUP_TTL):
+        self._redis = redis
+        self._ttl = ttl
+        self._seen = TTLCache(UPDATE_DEDUP_CACHE_SIZE, ttl)
+
+    async def _is_first_delivery(self, bot_id: int, update_id: int) -> bool:
+        if self._redis is not None:
+            try:
+                return bool(
+                    await self._redis.set(
+                        f"{UPDATE_DEDUP_PREFIX}:{bot_id}:{update_id}", 1, nx=True, ex=self._ttl
+                    )
+                )
+            except RedisError as exc:
+                logger.warning("Redis недоступен, дедупликация апдейтов в памяти: %s", exc)
+        key = (bot_id, update_id)
+        if self._seen.get(key):
+            return False
+        self._seen.set(key, True)
+        return True
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update) and not await self._is_first_delivery(
+            data["bot"].id, event.update_id
+        ):
+            logger.info("Повторная доставка апдейта %s пропущена", event.update_id)
+            return None
+        return await handler(event, data)
+
+
+async def _healthz(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+def build_webhook_app(dp: Dispatcher, bot: Bot) -> web.Application:
+    """Приложение aiohttp с обработчиком вебхука на `BOT_WEBHOOK_PATH` и `/healthz`."""
+    app = web.Application()
+    app.router.add_get("/healthz", _healthz)
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(
+        app, path=WEBHOOK_PATH
+    )
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Принимает апдейты вебхуком на aiohttp до SIGTERM/SIGINT.
+
+    Реплики за балансировщиком равноправны: каждая при старте регистрирует
+    один и тот же `BOT_WEBHOOK_URL`, а при остановке вебхук не снимает.
+    """
+    runner = web.AppRunner(build_webhook_app(dp, bot))
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+    logger.info("Вебхук слушает %s:%s%s", WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH)
+    if WEBHOOK_URL:
+        await bot.set_webhook(
+            WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+        )
+        logger.info("Вебхук зарегистрирован: %s", WEBHOOK_URL)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()